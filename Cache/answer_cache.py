@@ -0,0 +1,218 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import sqlite3
+import asyncio
+import threading
+import unicodedata
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# —————————————————————————————————————
+#  Pipeline-level answer cache
+# —————————————————————————————————————
+# Maps a fuzzy fingerprint of the user's query to the Markdown summary the
+# Research→Summary chain produced for it. Fingerprints are MinHash signatures
+# over character shingles of the normalized query, bucketed with LSH bands so
+# lookups stay indexed. Everything is computed locally.
+# Shingles barely register a changed digit or a short extra word ("world cup
+# 2022" vs "2026" scores 0.83, "history of india" vs "indiana" too), so MinHash
+# only finds candidates: a hit is served only when both queries reduce to the
+# same set of topic words, in any order. The cache is shared
+# by all sessions, so queries that lean on earlier turns ("tell me more about
+# its economy") are neither served nor stored.
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE = 3
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EA7C4)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+# Request boilerplate that carries no topic information.
+FILLER_WORDS = {
+    "a", "an", "the", "me", "about", "tell", "tel", "please", "pls", "can", "could",
+    "you", "give", "show", "find", "search", "info", "information", "on", "of",
+    "what", "whats", "is", "are", "who", "latest", "news", "some", "details",
+    "detail", "i", "want", "to", "know", "explain", "describe", "summarize", "summary",
+}
+
+# Words that point back into the conversation instead of naming a topic.
+CONTEXT_WORDS = {
+    "it", "its", "they", "them", "their", "this", "that", "these", "those", "he", "him",
+    "his", "she", "her", "above", "previous", "earlier", "same", "again", "more", "else",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    query       TEXT NOT NULL,
+    signature   TEXT NOT NULL,
+    summary     TEXT NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS answer_bands (
+    band        INTEGER NOT NULL,
+    bucket      TEXT NOT NULL,
+    answer_id   INTEGER NOT NULL REFERENCES answers(id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_answer_bands ON answer_bands(band, bucket);
+CREATE INDEX IF NOT EXISTS idx_answers_created ON answers(created_at);
+"""
+
+
+def normalize_topic(query: str) -> str:
+    """
+    Reduce a query to its topic words: case-folded, punctuation stripped and
+    request boilerplate ("tell me about", "latest on") removed.
+    """
+    text = unicodedata.normalize("NFKC", query).casefold()
+    words = re.findall(r"\w+", text)
+    return " ".join(w for w in words if w not in FILLER_WORDS)
+
+
+def topic_words(topic: str) -> frozenset:
+    return frozenset(topic.split())
+
+
+def depends_on_history(query: str) -> bool:
+    """
+    True if the query refers back to earlier turns, so its answer is not a
+    function of the query text alone.
+    """
+    words = re.findall(r"\w+", unicodedata.normalize("NFKC", query).casefold())
+    return any(w in CONTEXT_WORDS for w in words)
+
+
+def shingles(text: str) -> set[str]:
+    if len(text) <= SHINGLE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+
+
+def minhash(text: str) -> List[int]:
+    """
+    MinHash signature of the text's character shingles.
+    """
+    bases = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+        for s in shingles(text)
+    ]
+    return [min((a * x + b) % _PRIME for x in bases) for a, b in _PERMS]
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """
+    Estimated Jaccard similarity of two signatures.
+    """
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def band_buckets(signature: List[int]) -> List[str]:
+    return [
+        hashlib.blake2b(
+            ",".join(map(str, signature[b * ROWS:(b + 1) * ROWS])).encode(), digest_size=8
+        ).hexdigest()
+        for b in range(BANDS)
+    ]
+
+
+class AnswerCache:
+    def __init__(self, path: Path, freshness: float, threshold: float):
+        self.path = Path(path)
+        self.freshness = freshness
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def lookup(self, query: str) -> Optional[Tuple[str, str, float]]:
+        """
+        Return (cached query, summary, similarity) of the closest fresh answer,
+        or None if nothing is similar enough.
+        """
+        topic = normalize_topic(query)
+        if not topic or depends_on_history(query):
+            return None
+        signature = minhash(topic)
+        buckets = band_buckets(signature)
+        cutoff = time.time() - self.freshness
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT DISTINCT a.id, a.query, a.signature, a.summary FROM answers a "
+                "JOIN answer_bands b ON b.answer_id = a.id "
+                "WHERE a.created_at >= ? AND (" + " OR ".join(["(b.band = ? AND b.bucket = ?)"] * BANDS) + ")",
+                [cutoff] + [v for band, bucket in enumerate(buckets) for v in (band, bucket)],
+            ).fetchall()
+            best = None
+            for _, cached_query, sig, summary in rows:
+                score = similarity(signature, json.loads(sig))
+                if topic_words(normalize_topic(cached_query)) != topic_words(topic):
+                    continue  # another year, an extra word ("indiana", "world war ii")...
+                if score >= self.threshold and (best is None or score > best[2]):
+                    best = (cached_query, summary, score)
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return best
+
+    def store(self, query: str, summary: str) -> None:
+        topic = normalize_topic(query)
+        if not topic or not summary.strip() or depends_on_history(query):
+            return
+        signature = minhash(topic)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM answers WHERE created_at < ?", (now - self.freshness,))
+            cur = conn.execute(
+                "INSERT INTO answers (query, signature, summary, created_at) VALUES (?, ?, ?, ?)",
+                (query, json.dumps(signature), summary, now),
+            )
+            conn.executemany(
+                "INSERT INTO answer_bands (band, bucket, answer_id) VALUES (?, ?, ?)",
+                [(band, bucket, cur.lastrowid) for band, bucket in enumerate(band_buckets(signature))],
+            )
+            conn.commit()
+
+    async def alookup(self, query: str) -> Optional[Tuple[str, str, float]]:
+        return await asyncio.to_thread(self.lookup, query)
+
+    async def astore(self, query: str, summary: str) -> None:
+        await asyncio.to_thread(self.store, query, summary)
+
+
+_cache: Optional[AnswerCache] = None
+
+
+def get_answer_cache() -> Optional[AnswerCache]:
+    """
+    Return the process-wide answer cache, or None when ANSWER_CACHE_TTL is 0.
+    """
+    global _cache
+    freshness = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+    if freshness <= 0:
+        return None
+    if _cache is None:
+        _cache = AnswerCache(
+            path=Path(os.getenv("ANSWER_CACHE_PATH", ".cache/answer_cache.sqlite3")),
+            freshness=freshness,
+            threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.8")),
+        )
+    return _cache
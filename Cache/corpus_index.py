@@ -0,0 +1,287 @@
+import os
+import re
+import sys
+import math
+import time
+import hashlib
+import sqlite3
+import asyncio
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from Cache.answer_cache import FILLER_WORDS
+
+# —————————————————————————————————————
+#  Local BM25 index over paid-for results
+# —————————————————————————————————————
+# Every search result handed to Research_Agent and every Summary_Agent answer
+# is added to one inverted index shared by all sessions (SQLite: documents,
+# postings, document frequencies). Updates are incremental: a document is
+# keyed by URL (or by its text for summaries) and re-indexed only when its text
+# changes. find_results in Tool/search_tool.py asks the index first and only
+# calls Tavily when the local hits don't cover the query well enough.
+# Coverage is the IDF-weighted share of the query's terms that appear in a
+# document, and every returned hit must cover the query on its own: terms
+# spread over unrelated documents ("python" in one, "snake venom" in another)
+# don't count. Documents older than LOCAL_INDEX_MAX_AGE are ignored, and
+# queries asking for fresh information always go to Tavily.
+
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = FILLER_WORDS | {
+    "and", "or", "but", "in", "at", "by", "for", "with", "from", "as", "was", "were",
+    "be", "been", "it", "its", "this", "that", "these", "those", "which", "has", "have",
+    "had", "not", "no", "do", "does", "did", "than", "then", "there", "their", "they",
+    "he", "she", "his", "her", "we", "our", "also", "into", "such", "can", "will",
+}
+FRESH_RE = re.compile(r"\b(latest|news|today|tonight|yesterday|recent(ly)?|current(ly)?|breaking|this (week|month|year))\b", re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    key       TEXT NOT NULL UNIQUE,
+    kind      TEXT NOT NULL,
+    title     TEXT NOT NULL,
+    url       TEXT NOT NULL,
+    body      TEXT NOT NULL,
+    digest    TEXT NOT NULL,
+    length    INTEGER NOT NULL,
+    added_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term    TEXT NOT NULL,
+    doc_id  INTEGER NOT NULL,
+    tf      INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS terms (
+    term  TEXT PRIMARY KEY,
+    df    INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def stem(word: str) -> str:
+    # Plural folding only: "reefs" / "reef", "studies" / "study"
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return [stem(w) for w in re.findall(r"\w+", text) if len(w) > 1 and w not in STOPWORDS]
+
+
+class CorpusIndex:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.local_hits = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _remove(self, conn: sqlite3.Connection, doc_id: int) -> None:
+        terms = [t for (t,) in conn.execute("SELECT term FROM postings WHERE doc_id = ?", (doc_id,))]
+        conn.executemany("UPDATE terms SET df = df - 1 WHERE term = ?", [(t,) for t in terms])
+        conn.execute("DELETE FROM terms WHERE df <= 0")
+        conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+    def add(self, docs: List[Dict]) -> int:
+        """
+        Index documents ({kind, title, url, text}); returns how many were new
+        or changed. Unchanged documents cost one lookup.
+        """
+        added = 0
+        with self._lock:
+            conn = self._connect()
+            for doc in docs:
+                text = doc.get("text") or ""
+                terms = Counter(tokenize(f"{doc.get('title') or ''} {text}"))
+                if not terms:
+                    continue
+                digest = hashlib.sha256(text.encode()).hexdigest()
+                key = doc.get("url") or f"{doc.get('kind', 'doc')}:{digest}"
+                row = conn.execute("SELECT id, digest FROM docs WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if row[1] == digest:
+                        # Seen again unchanged: still current
+                        conn.execute("UPDATE docs SET added_at = ? WHERE id = ?", (time.time(), row[0]))
+                        continue
+                    self._remove(conn, row[0])
+                cursor = conn.execute(
+                    "INSERT INTO docs (key, kind, title, url, body, digest, length, added_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, doc.get("kind", "result"), doc.get("title") or "", doc.get("url") or "",
+                     text, digest, sum(terms.values()), time.time()),
+                )
+                doc_id = cursor.lastrowid
+                conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    [(term, doc_id, tf) for term, tf in terms.items()],
+                )
+                conn.executemany(
+                    "INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                    [(term,) for term in terms],
+                )
+                added += 1
+            conn.commit()
+        return added
+
+    def search(self, query: str, k: int = 5, max_age: Optional[float] = None) -> Tuple[List[Dict], float]:
+        """
+        Top-k documents by BM25, skipping those indexed more than `max_age`
+        seconds ago, and the lowest coverage of the query's terms by any one
+        of them.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], 0.0
+        with self._lock:
+            conn = self._connect()
+            n_docs, total_length = conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs").fetchone()
+            if not n_docs:
+                return [], 0.0
+            avgdl = total_length / n_docs
+            marks = ",".join("?" * len(terms))
+            dfs = dict(conn.execute(f"SELECT term, df FROM terms WHERE term IN ({marks})", terms))
+            oldest = time.time() - max_age if max_age else 0.0
+            postings = conn.execute(
+                f"SELECT p.term, p.doc_id, p.tf, d.length FROM postings p "
+                f"JOIN docs d ON d.id = p.doc_id WHERE p.term IN ({marks}) AND d.added_at >= ?",
+                (*terms, oldest),
+            ).fetchall()
+
+            idf = {t: math.log(1 + (n_docs - dfs.get(t, 0) + 0.5) / (dfs.get(t, 0) + 0.5)) for t in terms}
+            scores: Dict[int, float] = {}
+            matched: Dict[int, set] = {}
+            for term, doc_id, tf, length in postings:
+                norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avgdl))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf[term] * norm
+                matched.setdefault(doc_id, set()).add(term)
+            top = sorted(scores, key=scores.get, reverse=True)[:k]
+            if not top:
+                return [], 0.0
+            rows = {
+                row[0]: row for row in conn.execute(
+                    f"SELECT id, kind, title, url, body FROM docs WHERE id IN ({','.join('?' * len(top))})", top
+                )
+            }
+        total_idf = sum(idf.values())
+        covers = {d: sum(idf[t] for t in matched[d]) / total_idf for d in top}
+        hits = [
+            {"kind": rows[d][1], "title": rows[d][2], "url": rows[d][3] or f"local:{rows[d][1]}/{d}",
+             "content": rows[d][4], "score": round(scores[d], 3), "coverage": round(covers[d], 3)}
+            for d in top
+        ]
+        return hits, min(covers.values())
+
+    async def aadd(self, docs: List[Dict]) -> int:
+        return await asyncio.to_thread(self.add, docs)
+
+    async def asearch(self, query: str, k: int = 5, max_age: Optional[float] = None) -> Tuple[List[Dict], float]:
+        return await asyncio.to_thread(self.search, query, k, max_age)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            docs, terms = self._connect().execute(
+                "SELECT (SELECT COUNT(*) FROM docs), (SELECT COUNT(*) FROM terms)"
+            ).fetchone()
+        return {"docs": docs, "terms": terms, "local_hits": self.local_hits, "fallbacks": self.fallbacks}
+
+
+_index: Optional[CorpusIndex] = None
+
+
+def get_corpus_index() -> Optional[CorpusIndex]:
+    """
+    Return the process-wide index, or None when LOCAL_INDEX=0.
+    """
+    global _index
+    if os.getenv("LOCAL_INDEX", "1") == "0":
+        return None
+    if _index is None:
+        _index = CorpusIndex(Path(os.getenv("LOCAL_INDEX_PATH", ".cache/corpus_index.sqlite3")))
+    return _index
+
+
+async def local_results(query: str, max_results: int) -> Optional[List[Dict]]:
+    """
+    Results for `query` from the local index when at least max_results hits,
+    none older than LOCAL_INDEX_MAX_AGE seconds (default 604800, 0 disables),
+    each cover it well enough (LOCAL_INDEX_MIN_COVERAGE, default 0.9); None
+    means ask Tavily.
+    """
+    index = get_corpus_index()
+    if index is None or FRESH_RE.search(query):
+        return None
+    max_age = float(os.getenv("LOCAL_INDEX_MAX_AGE", "604800"))
+    hits, coverage = await index.asearch(query, max_results, max_age or None)
+    if len(hits) >= max_results and coverage >= float(os.getenv("LOCAL_INDEX_MIN_COVERAGE", "0.9")):
+        index.local_hits += 1
+        return hits
+    index.fallbacks += 1
+    return None
+
+
+async def index_results(results: List[Dict]) -> None:
+    """
+    Add formatted search results ({title, url, summary}) to the index.
+    """
+    index = get_corpus_index()
+    if index is not None:
+        await index.aadd([
+            {"kind": "result", "title": r.get("title"), "url": r.get("url"), "text": r.get("summary")}
+            for r in results if r.get("url") and not r["url"].startswith("local:")
+        ])
+
+
+async def index_summary(query: str, summary: str) -> None:
+    index = get_corpus_index()
+    if index is not None:
+        await index.aadd([{"kind": "summary", "title": query, "url": None, "text": summary}])
+
+
+def backfill(index: CorpusIndex, sessions) -> int:
+    """
+    Index assistant answers found in stored session histories, each titled by
+    the user message it answered.
+    """
+    docs = []
+    for state in sessions:
+        question = ""
+        for entry in state.get("history") or []:
+            if entry.get("role") == "user":
+                question = entry.get("content") or ""
+            elif entry.get("role") == "assistant" and len(entry.get("content") or "") >= 200:
+                docs.append({"kind": "summary", "title": question, "url": None, "text": entry["content"]})
+    return index.add(docs)
+
+
+if __name__ == "__main__":
+    # python -m Cache.corpus_index backfill | stats
+    from Context.session_store import get_session_store
+
+    index = get_corpus_index() or CorpusIndex(Path(os.getenv("LOCAL_INDEX_PATH", ".cache/corpus_index.sqlite3")))
+    if sys.argv[1:] == ["backfill"]:
+        store = get_session_store()
+        print(f"Indexed {backfill(index, store.export())} answer(s) from stored sessions")
+        asyncio.run(store.close())
+    elif sys.argv[1:] == ["stats"]:
+        print(index.stats())
+    else:
+        print("Usage: python -m Cache.corpus_index backfill | stats")
@@ -1,6 +1,10 @@
 # dynamic_context.py
+from typing import TYPE_CHECKING
 from pydantic import BaseModel, Field
-from agents import Agent, RunContextWrapper
+from Context.history import history_manager
+
+if TYPE_CHECKING:  # the SDK is loaded with the agents, not with the session store
+    from agents import Agent, RunContextWrapper
 # Removed unused import: from agents import function_tool
 
 # Define LocalContext class
@@ -14,8 +18,10 @@ class LocalContext(BaseModel):
     preferred_language: str = Field("en", description="e.g. 'en', 'es'")
     previous_steps: list[str] = Field(default_factory=list, description="Pipeline steps done")
     history: list[dict] = Field(default_factory=list, description="Conversation history")
+    history_summary: str = Field("", description="Running summary of turns folded out of the window")
+    summarized_turns: int = Field(0, description="Leading history entries covered by history_summary")
 
-async def dynamic_context_wrapper(ctx:RunContextWrapper[LocalContext] ,agent:Agent[LocalContext]) -> str:
+async def dynamic_context_wrapper(ctx:"RunContextWrapper[LocalContext]" ,agent:"Agent[LocalContext]") -> str:
     """
     Combines static Triage instructions with dynamic LocalContext.
 
@@ -41,6 +47,16 @@ async def dynamic_context_wrapper(ctx:RunContextWrapper[LocalContext] ,agent:Age
         f"- Preferred language: {ctx.context.preferred_language}\n"
         f"- Previous steps: {', '.join(ctx.context.previous_steps)}\n"
     )
+    # 3️⃣ Token-budgeted conversation memory (see Context/history.py for its cost)
+    if not history_manager.budget_tokens:
+        return dynamic
+    if ctx.context.history_summary:
+        dynamic += f"Earlier conversation (summary):\n{ctx.context.history_summary}\n"
+    recent = history_manager.window(ctx.context)
+    if recent:
+        dynamic += "Recent turns:\n" + "\n".join(
+            f"- {entry.get('role', '?')}: {history_manager.entry_text(entry)}" for entry in recent
+        ) + "\n"
     return dynamic
 
 # Rebuild the model schema
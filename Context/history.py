@@ -0,0 +1,176 @@
+import os
+import asyncio
+from typing import Any, Dict, List, Optional
+
+# —————————————————————————————————————
+#  Token-budgeted rolling history
+# —————————————————————————————————————
+# LocalContext.history keeps every turn (it is the persisted record), but only
+# a recent window that fits HISTORY_TOKEN_BUDGET is shown to the model.
+# Turns that fall out of the window are folded, in the background, into
+# LocalContext.history_summary; LocalContext.summarized_turns counts how many
+# leading history entries that summary already covers.
+#
+# Trade-off: the window and the summary go into the Triage instructions, so
+# every turn pays up to HISTORY_TOKEN_BUDGET + HISTORY_SUMMARY_TOKENS extra
+# input tokens (600 + 200 by default) in exchange for Triage resolving
+# follow-ups ("and its economy?"). Each entry is clipped to
+# HISTORY_ENTRY_TOKENS (150) so one search dump can't fill the window. Folding
+# is extractive by default; HISTORY_FOLD=model uses a History_Compactor run
+# instead, one background model call per fold. Set HISTORY_TOKEN_BUDGET=0 to
+# keep history out of the prompt entirely.
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token) used for budgeting.
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def clip(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[: max_tokens * CHARS_PER_TOKEN].rsplit(" ", 1)[0] + "…"
+
+
+COMPACTOR_INSTRUCTIONS = """
+You maintain a running summary of a research conversation.
+You receive the current summary followed by older conversation turns.
+Merge them into one updated summary of at most 8 short bullet points:
+the topics the user asked about and the key facts already given.
+Drop greetings, tool chatter and repeated content. Return only the summary.
+"""
+
+_compactor = None
+
+
+def get_history_compactor():
+    global _compactor
+    if _compactor is None:
+        from agents import Agent
+        from Models.registry import get_model
+
+        _compactor = Agent(
+            name="History_Compactor",
+            model=get_model("background"),
+            instructions=COMPACTOR_INSTRUCTIONS,
+        )
+    return _compactor
+
+
+class HistoryManager:
+    def __init__(self, budget_tokens: Optional[int] = None, summary_tokens: Optional[int] = None):
+        self._budget_tokens = budget_tokens
+        self._summary_tokens = summary_tokens
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    @property
+    def budget_tokens(self) -> int:
+        if self._budget_tokens is not None:
+            return self._budget_tokens
+        return int(os.getenv("HISTORY_TOKEN_BUDGET", "600"))
+
+    @property
+    def summary_tokens(self) -> int:
+        return self._summary_tokens or int(os.getenv("HISTORY_SUMMARY_TOKENS", "200"))
+
+    def entry_text(self, entry: Dict[str, Any]) -> str:
+        """
+        An entry's content as shown to the model (clipped to HISTORY_ENTRY_TOKENS).
+        """
+        return clip(str(entry.get("content", "")), int(os.getenv("HISTORY_ENTRY_TOKENS", "150")))
+
+    def entry_tokens(self, entry: Dict[str, Any]) -> int:
+        return estimate_tokens(self.entry_text(entry)) + 4  # role/framing overhead
+
+    def window_start(self, context: Any) -> int:
+        """
+        Index of the oldest history entry that still fits the token budget.
+        """
+        used = 0
+        start = len(context.history)
+        while start > context.summarized_turns:
+            cost = self.entry_tokens(context.history[start - 1])
+            if used + cost > self.budget_tokens:
+                break
+            used += cost
+            start -= 1
+        return start
+
+    def window(self, context: Any) -> List[Dict[str, Any]]:
+        return context.history[self.window_start(context):]
+
+    def context_tokens(self, context: Any) -> Dict[str, int]:
+        """
+        Current token cost of the context as the model sees it.
+        """
+        if not self.budget_tokens:
+            return {"summary": 0, "window": 0, "pending_fold": 0, "total": 0}
+        summary = estimate_tokens(context.history_summary)
+        window = sum(self.entry_tokens(e) for e in self.window(context))
+        pending = sum(self.entry_tokens(e) for e in context.history[context.summarized_turns:]) - window
+        return {"summary": summary, "window": window, "pending_fold": pending, "total": summary + window}
+
+    def schedule_compaction(self, context: Any) -> Optional[asyncio.Task]:
+        """
+        Fold turns that fell out of the window into the running summary,
+        in a background task. At most one compaction runs per context.
+        """
+        if not self.budget_tokens:
+            return None  # history isn't shown, nothing to fold
+        key = id(context)
+        running = self._tasks.get(key)
+        if running is not None and not running.done():
+            return running
+        upto = self.window_start(context)
+        if upto <= context.summarized_turns:
+            return None
+        task = asyncio.create_task(self._compact(context, upto))
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return task
+
+    async def _compact(self, context: Any, upto: int) -> None:
+        entries = context.history[context.summarized_turns:upto]
+        summary = None
+        if os.getenv("HISTORY_FOLD", "extractive") == "model":
+            turns = "\n".join(f"{e.get('role', '?')}: {str(e.get('content', ''))[:2000]}" for e in entries)
+            prompt = f"Current summary:\n{context.history_summary or '(none)'}\n\nOlder turns:\n{turns}"
+            try:
+                from agents import Runner
+
+                result = await Runner.run(get_history_compactor(), prompt)
+                summary = str(result.final_output)
+            except Exception:
+                pass
+        if summary is None:
+            summary = self._extractive_fold(context.history_summary, entries)
+        # Assign both fields together (no await in between) so savers never see half a fold.
+        # The extractive fold appends, so keep its most recent lines.
+        context.history_summary = summary[-self.summary_tokens * CHARS_PER_TOKEN:]
+        context.summarized_turns = upto
+
+    @staticmethod
+    def _extractive_fold(summary: str, entries: List[Dict[str, Any]]) -> str:
+        """
+        Local fallback: keep the first line of each folded turn.
+        """
+        lines = [summary] if summary else []
+        for e in entries:
+            first = str(e.get("content", "")).strip().splitlines()[:1]
+            if first:
+                lines.append(f"- {e.get('role', '?')}: {first[0][:160]}")
+        return "\n".join(lines)
+
+    async def drain(self) -> None:
+        """
+        Wait for outstanding compactions (e.g. before shutdown).
+        """
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+
+history_manager = HistoryManager()
@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+from pydantic import BaseModel
+
+# —————————————————————————————————————
+#  Append-only context journal
+# —————————————————————————————————————
+# Instead of rewriting the whole context after every message, each save
+# appends only what changed since the last one:
+#   {"op": "snapshot", "data": {...}}              full state (first line after compaction)
+#   {"op": "set", "field": "query", "value": ...}  a top-level field changed
+#   {"op": "append", "entry": {...}}               a new history entry
+# Replaying the lines rebuilds the context. Every `compact_every` records the
+# journal is rewritten as a single snapshot so replay stays short. A journal
+# that doesn't end in a newline was torn by a crash mid-write: replay drops the
+# fragment and the next save rewrites a snapshot, so nothing is appended onto
+# it. `python -m Context.journal check` exercises that recovery.
+
+TModel = TypeVar("TModel", bound=BaseModel)
+
+HISTORY_FIELD = "history"
+
+
+def _open(path: Path, mode: str):
+    import aiofiles  # loaded by the first journal read/write, not at startup
+
+    return aiofiles.open(path, mode)
+
+
+def replay(lines: List[str]) -> Dict[str, Any]:
+    """
+    Fold journal lines into a state dict. A torn last line (crash mid-write)
+    is ignored.
+    """
+    state: Dict[str, Any] = {}
+    for number, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            if number == len(lines) - 1:
+                break
+            raise
+        op = record["op"]
+        if op == "snapshot":
+            state = dict(record["data"])
+        elif op == "set":
+            state[record["field"]] = record["value"]
+        elif op == "append":
+            state.setdefault(HISTORY_FIELD, []).append(record["entry"])
+        else:
+            raise ValueError(f"Unknown journal op: '{op}'")
+    return state
+
+
+class ContextJournal:
+    def __init__(self, path: Path, compact_every: Optional[int] = None):
+        self.path = Path(path)
+        self.compact_every = compact_every or int(os.getenv("JOURNAL_COMPACT_EVERY", "200"))
+        self._fields: Dict[str, Any] = {}
+        self._history_len = 0
+        self._records = 0
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def load(cls, path: Path, model: Type[TModel]) -> Tuple["ContextJournal", TModel]:
+        """
+        Rebuild a context by replaying its journal.
+        """
+        journal = cls(path)
+        async with _open(journal.path, "r") as f:
+            text = await f.read()
+        lines = text.splitlines()
+        context = model(**replay(lines))
+        journal._mark_saved(context)
+        # Torn tail: 0 records makes the next save replace the file with a snapshot
+        journal._records = len(lines) if text.endswith("\n") else 0
+        return journal, context
+
+    def _mark_saved(self, context: BaseModel) -> None:
+        self._fields = context.model_dump(exclude={HISTORY_FIELD})
+        self._history_len = len(getattr(context, HISTORY_FIELD))
+
+    def _delta(self, context: BaseModel) -> List[Dict[str, Any]]:
+        records = [
+            {"op": "set", "field": field, "value": value}
+            for field, value in context.model_dump(exclude={HISTORY_FIELD}).items()
+            if self._fields.get(field, object()) != value
+        ]
+        history = getattr(context, HISTORY_FIELD)
+        records.extend({"op": "append", "entry": entry} for entry in history[self._history_len:])
+        return records
+
+    async def snapshot(self, context: BaseModel) -> None:
+        """
+        Compact the journal to one snapshot line (written atomically).
+        """
+        async with self._lock:
+            await self._write_snapshot(context)
+
+    async def _write_snapshot(self, context: BaseModel) -> None:
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        async with _open(tmp, "w") as f:
+            await f.write(json.dumps({"op": "snapshot", "data": context.model_dump()}) + "\n")
+        os.replace(tmp, self.path)
+        self._mark_saved(context)
+        self._records = 1
+
+    async def record(self, context: BaseModel) -> None:
+        """
+        Append whatever changed since the last save. Cost is proportional to
+        the change, not to the size of the history.
+        """
+        async with self._lock:
+            if self._records == 0:
+                await self._write_snapshot(context)
+                return
+            records = self._delta(context)
+            if not records:
+                return
+            async with _open(self.path, "a") as f:
+                await f.write("".join(json.dumps(r) + "\n" for r in records))
+            self._mark_saved(context)
+            self._records += len(records)
+            if self._records >= self.compact_every:
+                await self._write_snapshot(context)
+
+
+async def check_torn_write() -> None:
+    """
+    Regression check: a save after a torn write must neither lose entries nor
+    leave a journal that fails to load.
+    """
+
+    class Sample(BaseModel):
+        query: str = ""
+        history: List[Dict[str, Any]] = []
+
+    with tempfile.TemporaryDirectory() as root:
+        path = Path(root) / "context.jsonl"
+        journal = ContextJournal(path)
+        context = Sample(query="first", history=[{"role": "user", "content": "one"}])
+        await journal.record(context)
+        context.history.append({"role": "assistant", "content": "two"})
+        await journal.record(context)
+        with open(path, "a") as f:
+            f.write('{"op": "append", "entry": {"role": "us')  # crash mid-write
+
+        journal, context = await ContextJournal.load(path, Sample)
+        assert [e["content"] for e in context.history] == ["one", "two"]
+        context.history.append({"role": "user", "content": "three"})
+        await journal.record(context)
+        context.query = "second"
+        await journal.record(context)
+
+        _, reloaded = await ContextJournal.load(path, Sample)
+        assert reloaded == context, reloaded
+    print("journal torn-write recovery: ok")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["check"]:
+        asyncio.run(check_torn_write())
+    else:
+        print("Usage: python -m Context.journal check")
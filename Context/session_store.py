@@ -0,0 +1,247 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from Context.dynamic import LocalContext
+from Context.journal import ContextJournal, replay
+
+# —————————————————————————————————————
+#  Pluggable session store
+# —————————————————————————————————————
+# main.py loads and saves LocalContext through a SessionStore. Three backends:
+#   - SQLiteSessionStore (default): one WAL-mode database indexed by user_id,
+#     concurrent readers, one transaction per save.
+#   - JournalSessionStore: one append-only context_{user_id}.jsonl per user.
+#   - MemorySessionStore: process-local, nothing persisted (batch jobs).
+# Pick one with SESSION_STORE=sqlite|journal|memory.
+
+class SessionStore(ABC):
+    @abstractmethod
+    async def exists(self, user_id: str) -> bool: ...
+
+    @abstractmethod
+    async def load(self, user_id: str) -> Optional[LocalContext]: ...
+
+    @abstractmethod
+    async def save(self, context: LocalContext) -> None: ...
+
+    @abstractmethod
+    def export(self) -> Iterator[dict]:
+        """
+        Yield every stored session as a plain dict (bulk export).
+        """
+
+    async def close(self) -> None:
+        pass
+
+
+class JournalSessionStore(SessionStore):
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._journals: Dict[str, ContextJournal] = {}
+
+    def path(self, user_id: str) -> Path:
+        return self.directory / f"context_{user_id}.jsonl"
+
+    async def exists(self, user_id: str) -> bool:
+        return self.path(user_id).exists()
+
+    async def load(self, user_id: str) -> Optional[LocalContext]:
+        if not self.path(user_id).exists():
+            return None
+        journal, context = await ContextJournal.load(self.path(user_id), LocalContext)
+        self._journals[user_id] = journal
+        return context
+
+    async def save(self, context: LocalContext) -> None:
+        journal = self._journals.get(context.user_id)
+        if journal is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            journal = self._journals[context.user_id] = ContextJournal(self.path(context.user_id))
+        await journal.record(context)
+
+    def export(self) -> Iterator[dict]:
+        for path in sorted(self.directory.glob("context_*.jsonl")):
+            yield replay(path.read_text().splitlines())
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self):
+        self._sessions: Dict[str, LocalContext] = {}
+
+    async def exists(self, user_id: str) -> bool:
+        return user_id in self._sessions
+
+    async def load(self, user_id: str) -> Optional[LocalContext]:
+        return self._sessions.get(user_id)
+
+    async def save(self, context: LocalContext) -> None:
+        self._sessions[context.user_id] = context
+
+    def export(self) -> Iterator[dict]:
+        for user_id in sorted(self._sessions):
+            yield self._sessions[user_id].model_dump()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    user_id     TEXT PRIMARY KEY,
+    fields      TEXT NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    user_id  TEXT NOT NULL,
+    seq      INTEGER NOT NULL,
+    entry    TEXT NOT NULL,
+    PRIMARY KEY (user_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in one SQLite database. Writes go through a single connection
+    under a lock, each save in its own transaction; reads use per-thread
+    connections so WAL lets them run alongside the writer.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._write_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._local = threading.local()
+        # history rows already persisted per user, so saves only insert new ones
+        self._saved_len: Dict[str, int] = {}
+
+    def _open(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+        return conn
+
+    def _exists(self, user_id: str) -> bool:
+        return self._reader().execute(
+            "SELECT 1 FROM sessions WHERE user_id = ?", (user_id,)
+        ).fetchone() is not None
+
+    def _load(self, user_id: str) -> Optional[dict]:
+        conn = self._reader()
+        row = conn.execute("SELECT fields FROM sessions WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None
+        state = json.loads(row[0])
+        state["history"] = [
+            json.loads(entry)
+            for (entry,) in conn.execute(
+                "SELECT entry FROM history WHERE user_id = ? ORDER BY seq", (user_id,)
+            )
+        ]
+        return state
+
+    def _save(self, user_id: str, fields: dict, history: List[dict]) -> None:
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._open()
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                saved = self._saved_len.get(user_id)
+                if saved is None:
+                    (saved,) = conn.execute(
+                        "SELECT COUNT(*) FROM history WHERE user_id = ?", (user_id,)
+                    ).fetchone()
+                conn.execute(
+                    "INSERT INTO sessions (user_id, fields, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET fields = excluded.fields, updated_at = excluded.updated_at",
+                    (user_id, json.dumps(fields), time.time()),
+                )
+                conn.executemany(
+                    "INSERT INTO history (user_id, seq, entry) VALUES (?, ?, ?)",
+                    [(user_id, seq, json.dumps(entry)) for seq, entry in enumerate(history[saved:], start=saved)],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._saved_len[user_id] = max(saved, len(history))
+
+    async def exists(self, user_id: str) -> bool:
+        return await asyncio.to_thread(self._exists, user_id)
+
+    async def load(self, user_id: str) -> Optional[LocalContext]:
+        state = await asyncio.to_thread(self._load, user_id)
+        return LocalContext(**state) if state is not None else None
+
+    async def save(self, context: LocalContext) -> None:
+        fields = context.model_dump(exclude={"history"})
+        await asyncio.to_thread(self._save, context.user_id, fields, list(context.history))
+
+    def export(self) -> Iterator[dict]:
+        conn = self._reader()
+        for (user_id,) in conn.execute("SELECT user_id FROM sessions ORDER BY user_id").fetchall():
+            yield self._load(user_id)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def get_session_store() -> SessionStore:
+    backend = os.getenv("SESSION_STORE", "sqlite")
+    if backend == "sqlite":
+        return SQLiteSessionStore(Path(os.getenv("SESSION_DB_PATH", "Users/sessions.sqlite3")))
+    if backend == "journal":
+        return JournalSessionStore(Path(os.getenv("SESSION_DIR", ".")))
+    if backend == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"Unknown SESSION_STORE backend: '{backend}'")
+
+
+async def migrate_json_files(store: SessionStore, directory: Path) -> int:
+    """
+    Import legacy context_{user_id}.json files into the store. Sessions that
+    already exist in the store are left untouched. Returns the number imported.
+    """
+    imported = 0
+    for path in sorted(Path(directory).glob("context_*.json")):
+        context = LocalContext(**json.loads(path.read_text()))
+        if await store.exists(context.user_id):
+            continue
+        await store.save(context)
+        imported += 1
+    return imported
+
+
+async def _main(argv: List[str]) -> None:
+    store = get_session_store()
+    if len(argv) == 2 and argv[0] == "migrate":
+        count = await migrate_json_files(store, Path(argv[1]))
+        print(f"Imported {count} session(s) from {argv[1]}")
+    elif len(argv) == 2 and argv[0] == "export":
+        with open(argv[1], "w") as f:
+            for state in store.export():
+                f.write(json.dumps(state) + "\n")
+        print(f"Exported sessions to {argv[1]}")
+    else:
+        print("Usage: python -m Context.session_store migrate <dir> | export <out.jsonl>")
+    await store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main(sys.argv[1:]))
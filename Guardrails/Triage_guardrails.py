@@ -1,7 +1,5 @@
-import os
 from pydantic import BaseModel, Field
 from typing import Union, List
-from openai import AsyncOpenAI
 from agents import (
     Agent,
     Runner,
@@ -10,21 +8,15 @@ from agents import (
     GuardrailFunctionOutput,
     OutputGuardrailTripwireTriggered,
     RunContextWrapper,
-    OpenAIChatCompletionsModel,
 )
-# from tavily import TavilyClient  # if you still need it for search_web
+from Models.registry import get_model
+from Guardrails.verdict_cache import judge
+from Guardrails.fast_path import triage_check
 
 # —————————————————————————————————————
-#  Provider & model setup (unchanged)
+#  Model handle (shared client, see Models/registry.py)
 # —————————————————————————————————————
-Provider = AsyncOpenAI(
-    api_key=os.getenv("GEMINI_API_KEY"),
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-)
-model = OpenAIChatCompletionsModel(
-    model="gemini-2.0-flash-exp",
-    openai_client=Provider,
-)
+model = get_model("guardrail")
 
 # —————————————————————————————————————
 #  1️⃣ Input Guardrail Schema & Agent
@@ -53,13 +45,22 @@ async def triage_agent_guardrail(
     """
     Input guardrail that flags abusive or offensive user input.
     """
-    # Run the small guardrail agent with same context
-    result = await Runner.run(
-        guardrail_agent,
-        user_input,
-        context=ctx.context
-    )
-    verdict: TriageAgentGuardrail = result.final_output
+    fast = triage_check(user_input)
+    if fast is not None:
+        # Settled locally (greeting, profanity, short/templated text)
+        verdict = TriageAgentGuardrail(
+            is_abusive=not fast.allow,
+            is_offensive=not fast.allow,
+            reasoning=fast.reasoning,
+        )
+    else:
+        # Run the small guardrail agent with same context (memoized per input)
+        verdict: TriageAgentGuardrail = await judge(
+            "triage_agent_guardrail",
+            guardrail_agent,
+            user_input,
+            context=ctx.context
+        )
     trip = verdict.is_abusive or verdict.is_offensive
     print(f"### Triage Agent Input Guardrail: {verdict}")
     return GuardrailFunctionOutput(
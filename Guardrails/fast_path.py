@@ -0,0 +1,165 @@
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, List, Optional, Union
+
+# —————————————————————————————————————
+#  Local fast-path tier for the guardrails
+# —————————————————————————————————————
+# Lexicon, length/shape and regex rules that settle the obvious cases in
+# microseconds. Each check returns a confident FastVerdict or None; None means
+# "ambiguous" and the caller falls through to its LLM judge.
+
+@dataclass(frozen=True)
+class FastVerdict:
+    allow: bool
+    reasoning: str
+
+
+# Stems matched against whole de-leeted, de-stuttered tokens ("f**k", "sh1t"
+# included), alone or with an inflection: "shitty" matches, "shitake" doesn't.
+PROFANITY_STEMS = (
+    "fuck", "fuk", "fck", "motherfuck", "shit", "bitch", "ashole",
+    "cunt", "dickhead", "slut", "whore", "wanker", "retard",
+)
+PROFANITY_RE = re.compile(rf"({'|'.join(PROFANITY_STEMS)})(s|es|ed|er|ers|ing|in|y)?")
+# Hostile but context-dependent words: never allowed locally, left to the judge.
+HOSTILE_WORDS = {"kill", "hate", "stupid", "idiot", "dumb", "moron", "die", "bomb", "attack", "bastard"}
+
+GREETING_RE = re.compile(
+    r"^(hi+|hello+|hey+|hiya|yo|salam|assalam[uo]?\s*[ao]laikum|good\s+(morning|afternoon|evening|night)"
+    r"|thanks?|thank\s+you|thx|bye|goodbye|how\s+are\s+you|what'?s\s+up|sup)"
+    r"(\s+(there|everyone|all|bot|agent|buddy|friend))?[\s!.,?]*$",
+    re.IGNORECASE,
+)
+RESEARCH_RE = re.compile(
+    r"^\s*(please\s+)?("
+    r"tel+\s+me\s+(about|of)"
+    r"|(find|search|look\s+up|get|give\s+me)(\s+(some|me))?(\s+(info|information|details|facts|news))?\s+(about|on|for|regarding)"
+    r"|(find|search\s+for|look\s+up|research)"
+    r"|(what(\s+is|'s)\s+the\s+)?(latest|recent\s+news|news|updates?)\s+(on|about|in)"
+    r"|what\s+(is|are|was|were)|who\s+(is|are|was|were)|explain|describe"
+    r")\s+(?P<topic>.+?)[\s?.!]*$",
+    re.IGNORECASE,
+)
+VAGUE_TOPICS = {"something", "anything", "stuff", "things", "it", "this", "that", "me", "you", "everything"}
+URL_RE = re.compile(r"https?://\S+")
+
+MIN_TEXT_CHARS = 20
+
+stats: Counter = Counter()
+
+
+def _deleet(text: str) -> str:
+    text = text.lower().translate(str.maketrans({"1": "i", "!": "i", "0": "o", "3": "e", "@": "a", "$": "s", "*": "u"}))
+    return re.sub(r"(.)\1+", r"\1", text)
+
+
+def has_profanity(text: str) -> bool:
+    return any(
+        PROFANITY_RE.fullmatch(token)
+        for token in re.findall(r"[\w*@$!]+", _deleet(text))
+    )
+
+
+def has_hostile_words(text: str) -> bool:
+    return any(word in HOSTILE_WORDS for word in re.findall(r"\w+", text.lower()))
+
+
+def is_greeting(text: str) -> bool:
+    return bool(GREETING_RE.match(text.strip()))
+
+
+def research_topic(text: str) -> Optional[str]:
+    """
+    Topic of a templated research request ("tell me about X"), or None.
+    """
+    match = RESEARCH_RE.match(text.strip())
+    if not match:
+        return None
+    topic = match.group("topic").strip()
+    if topic.lower() in VAGUE_TOPICS:
+        return None
+    return topic
+
+
+def input_text(user_input: Union[str, List, Any], last_user_only: bool = False) -> Optional[str]:
+    """
+    Text carried by a guardrail input: the string itself, or the textual
+    content of a list of input items (optionally just the last user message).
+    Returns None if the items carry no plain text.
+    """
+    if isinstance(user_input, str):
+        return user_input
+    texts = []
+    for item in user_input or []:
+        if not isinstance(item, dict):
+            continue
+        if last_user_only and item.get("role") != "user":
+            continue
+        content = item.get("content")
+        if isinstance(content, str):
+            texts.append(content)
+        elif isinstance(content, list):
+            texts.extend(part.get("text", "") for part in content if isinstance(part, dict))
+    if not texts:
+        return None
+    return texts[-1] if last_user_only else "\n".join(texts)
+
+
+def _record(name: str, verdict: Optional[FastVerdict]) -> Optional[FastVerdict]:
+    stats[(name, "escalate" if verdict is None else "allow" if verdict.allow else "deny")] += 1
+    return verdict
+
+
+def triage_check(user_input: Union[str, List]) -> Optional[FastVerdict]:
+    """
+    Abuse/offense check in front of the Triage judge. Only plain greetings are
+    allowed locally: a templated or short request can still be abusive
+    ("explain why <group> are inferior"), so everything else that isn't
+    outright profanity goes to the judge.
+    """
+    text = input_text(user_input, last_user_only=True)
+    if text is None:
+        return _record("triage", None)
+    if has_profanity(text):
+        return _record("triage", FastVerdict(False, "Profanity lexicon match."))
+    if is_greeting(text):
+        return _record("triage", FastVerdict(True, "Plain greeting."))
+    return _record("triage", None)
+
+
+def research_input_check(user_input: Union[str, List]) -> Optional[FastVerdict]:
+    """
+    'Is this a clear research request?' check in front of the Research judge.
+    """
+    text = input_text(user_input, last_user_only=True)
+    if text is None:
+        return _record("research_input", None)
+    if is_greeting(text):
+        return _record("research_input", FastVerdict(False, "Greeting, not a research request."))
+    if research_topic(text) is not None:
+        return _record("research_input", FastVerdict(True, "Templated research request with a concrete topic."))
+    words = re.findall(r"\w+", text.lower())
+    if not words or all(w in VAGUE_TOPICS | {"tell", "me", "about", "something", "please"} for w in words):
+        return _record("research_input", FastVerdict(False, "Vague input without a topic."))
+    return _record("research_input", None)
+
+
+def summary_input_check(user_input: Union[str, List]) -> Optional[FastVerdict]:
+    """
+    'Is this a text block to summarize?' check in front of the Summary judge.
+    """
+    text = input_text(user_input)
+    if text is None:
+        return _record("summary_input", None)
+    stripped = text.strip()
+    if len(stripped) < MIN_TEXT_CHARS:
+        return _record("summary_input", FastVerdict(False, f"Text shorter than {MIN_TEXT_CHARS} characters."))
+    if is_greeting(stripped):
+        return _record("summary_input", FastVerdict(False, "Greeting, nothing to summarize."))
+    if stripped.endswith("?") and "\n" not in stripped and len(stripped) < 200:
+        return _record("summary_input", FastVerdict(False, "Single question, nothing to summarize."))
+    if URL_RE.search(stripped) and len(stripped) >= 200:
+        return _record("summary_input", FastVerdict(True, "Search payload with sources."))
+    return _record("summary_input", None)
@@ -1,26 +1,18 @@
-import os
 from pydantic import BaseModel, Field
 from typing import Union, List
-from openai import AsyncOpenAI
 from agents import (
     Agent,
-    Runner,
     input_guardrail,
     output_guardrail,
     GuardrailFunctionOutput,
     OutputGuardrailTripwireTriggered,
     RunContextWrapper,
-    OpenAIChatCompletionsModel,
 )
+from Models.registry import get_model
+from Guardrails.verdict_cache import judge
+from Guardrails.fast_path import research_input_check
 
-Provider = AsyncOpenAI(
-    api_key=os.getenv("GEMINI_API_KEY"),
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-)
-model = OpenAIChatCompletionsModel(
-    model="gemini-2.0-flash-exp",
-    openai_client=Provider,
-)
+model = get_model("guardrail")
 
 # 2️⃣ Research_Agent INPUT guardrail
 # ======================================================
@@ -46,13 +38,17 @@ async def research_input_guardrail(
     agent: Agent,
     user_input: Union[str, List]
 ) -> GuardrailFunctionOutput:
-    result = await Runner.run(
-        research_input_judge,
-        user_input,
-        context=ctx.context
-    )
+    fast = research_input_check(user_input)
+    if fast is not None:
+        verdict = ResearchInputGuard(is_valid_question=fast.allow, reasoning=fast.reasoning)
+    else:
+        verdict: ResearchInputGuard = await judge(
+            "research_input_guardrail",
+            research_input_judge,
+            user_input,
+            context=ctx.context
+        )
     print(f"### Research Input Guardrail: ")
-    verdict: ResearchInputGuard = result.final_output
     trip = not verdict.is_valid_question
     return GuardrailFunctionOutput(output_info=verdict, tripwire_triggered=trip)
 
@@ -84,13 +80,13 @@ async def research_output_guardrail(
     agent: Agent,
     output: str
 ) -> GuardrailFunctionOutput:
-    result = await Runner.run(
+    verdict: ResearchOutputGuard = await judge(
+        "research_output_guardrail",
         research_output_judge,
         output,
         context=ctx.context
     )
     print(f"### Research Output Guardrail: ")
-    verdict: ResearchOutputGuard = result.final_output
     if not (verdict.has_content and verdict.no_tool_mentions):
         raise OutputGuardrailTripwireTriggered(verdict.reasoning)
     
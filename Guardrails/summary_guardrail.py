@@ -1,26 +1,17 @@
-import os
 from pydantic import BaseModel, Field
 from typing import Union, List
-from openai import AsyncOpenAI
 from agents import (
     Agent,
-    Runner,
     input_guardrail,
     output_guardrail,
     GuardrailFunctionOutput,
-    OutputGuardrailTripwireTriggered,
     RunContextWrapper,
-    OpenAIChatCompletionsModel,
 )
+from Models.registry import get_model
+from Guardrails.verdict_cache import judge
+from Guardrails.fast_path import summary_input_check
 
-Provider = AsyncOpenAI(
-    api_key=os.getenv("GEMINI_API_KEY"),
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-)
-model = OpenAIChatCompletionsModel(
-    model="gemini-2.0-flash-exp",
-    openai_client=Provider,
-)
+model = get_model("guardrail")
 
 class SummaryInputGuard(BaseModel):
     is_valid_text: bool = Field(False, description="True if input is a text block to summarize")
@@ -43,13 +34,17 @@ async def summary_input_guardrail(
     agent: Agent,
     user_input: Union[str, List]
 ) -> GuardrailFunctionOutput:
-    result = await Runner.run(
-        summary_input_judge,
-        user_input,
-        context=ctx.context
-    )
+    fast = summary_input_check(user_input)
+    if fast is not None:
+        verdict = SummaryInputGuard(is_valid_text=fast.allow, reasoning=fast.reasoning)
+    else:
+        verdict: SummaryInputGuard = await judge(
+            "summary_input_guardrail",
+            summary_input_judge,
+            user_input,
+            context=ctx.context
+        )
     print(f"### Summary Input Guardrail: ")
-    verdict: SummaryInputGuard = result.final_output
     trip = not verdict.is_valid_text
     return GuardrailFunctionOutput(output_info=verdict, tripwire_triggered=trip)
 
@@ -87,13 +82,13 @@ async def summary_output_guardrail(
     # If output is a Pydantic model, get its text field; else assume str
     text = getattr(output, "response", output)
 
-    result = await Runner.run(
+    verdict: SummaryOutputGuardrail = await judge(
+        "summary_output_guardrail",
         guardrail_judge,
         text,
         context=ctx.context
     )
     print(f"### Summary Output Guardrail: ")
-    verdict: SummaryOutputGuardrail = result.final_output
     trip = verdict.out_of_context or verdict.contains_prohibited
 
     return GuardrailFunctionOutput(
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import asyncio
+import threading
+from pathlib import Path
+from collections import Counter, OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Type, TypeVar, Union, List
+from pydantic import BaseModel
+from agents import Agent, Runner
+from LifeCycle.metrics import metrics
+
+# —————————————————————————————————————
+#  Shared guardrail verdict cache
+# —————————————————————————————————————
+# Judge agents are deterministic enough that the same text gets the same
+# verdict, so verdicts are memoized by guardrail name + SHA-256 of the judged
+# text. An in-memory LRU keeps the hot set; set GUARDRAIL_CACHE_PATH to also
+# persist verdicts in SQLite across restarts.
+
+TVerdict = TypeVar("TVerdict", bound=BaseModel)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    key      TEXT PRIMARY KEY,
+    verdict  TEXT NOT NULL
+);
+"""
+
+
+def guardrail_text(user_input: Union[str, List, Any]) -> str:
+    """
+    Flatten a guardrail input (plain text or a list of input items) to a string.
+    """
+    if isinstance(user_input, str):
+        return user_input
+    return json.dumps(user_input, sort_keys=True, default=str)
+
+
+class VerdictCache:
+    def __init__(self, max_entries: int = 2048, path: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def make_key(name: str, text: str) -> str:
+        return f"{name}:{hashlib.sha256(text.encode()).hexdigest()}"
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _remember(self, key: str, payload: str) -> None:
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+            return payload
+
+    def get_disk(self, key: str) -> Optional[str]:
+        if self.path is None:
+            return None
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT verdict FROM verdicts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+        return row[0] if row else None
+
+    def put(self, key: str, payload: str) -> None:
+        with self._lock:
+            self._remember(key, payload)
+            if self.path is not None:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO verdicts (key, verdict) VALUES (?, ?)", (key, payload)
+                )
+                conn.commit()
+
+    async def lookup(self, name: str, text: str, schema: Type[TVerdict]) -> Optional[TVerdict]:
+        key = self.make_key(name, text)
+        payload = self.get_memory(key)
+        if payload is None and self.path is not None:
+            payload = await asyncio.to_thread(self.get_disk, key)
+        if payload is None:
+            self.misses[name] += 1
+            return None
+        self.hits[name] += 1
+        return schema.model_validate_json(payload)
+
+    async def store(self, name: str, text: str, verdict: BaseModel) -> None:
+        key = self.make_key(name, text)
+        payload = verdict.model_dump_json()
+        if self.path is None:
+            self.put(key, payload)
+        else:
+            await asyncio.to_thread(self.put, key, payload)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        names = set(self.hits) | set(self.misses)
+        return {
+            name: {
+                "hits": self.hits[name],
+                "misses": self.misses[name],
+                "hit_rate": self.hits[name] / (self.hits[name] + self.misses[name]),
+            }
+            for name in sorted(names)
+        }
+
+
+_cache: Optional[VerdictCache] = None
+# Judge runs in progress, so concurrent guardrails on the same text share one call.
+_inflight: Dict[str, "asyncio.Task[BaseModel]"] = {}
+_waiters: Counter = Counter()
+
+
+def get_verdict_cache() -> VerdictCache:
+    global _cache
+    if _cache is None:
+        path = os.getenv("GUARDRAIL_CACHE_PATH")
+        _cache = VerdictCache(
+            max_entries=int(os.getenv("GUARDRAIL_CACHE_MAX_ENTRIES", "2048")),
+            path=Path(path) if path else None,
+        )
+    return _cache
+
+
+async def judge(
+    name: str,
+    judge_agent: Agent,
+    user_input: Union[str, List],
+    context: Any = None,
+) -> BaseModel:
+    """
+    Run `judge_agent` on the input unless an identical input was already judged
+    by the same guardrail, in which case the memoized verdict is returned. An
+    identical judgement already in flight is awaited instead of started again;
+    it is cancelled when the last query waiting for it is.
+    """
+    started = time.perf_counter()
+    cache = get_verdict_cache()
+    text = guardrail_text(user_input)
+    schema = judge_agent.output_type
+    verdict = await cache.lookup(name, text, schema)
+    if verdict is not None:
+        metrics.observe("guardrail_cached", name, time.perf_counter() - started)
+        return verdict
+
+    key = cache.make_key(name, text)
+    task = _inflight.get(key)
+    if task is None:
+        async def run_judge() -> BaseModel:
+            result = await Runner.run(judge_agent, user_input, context=context)
+            await cache.store(name, text, result.final_output)
+            return result.final_output
+
+        task = asyncio.ensure_future(run_judge())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    _waiters[key] += 1
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        if _waiters[key] == 1:
+            task.cancel()
+        raise
+    finally:
+        _waiters[key] -= 1
+        if not _waiters[key]:
+            del _waiters[key]
+        metrics.observe("guardrail", name, time.perf_counter() - started)
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import asyncio
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Tuple
+
+# —————————————————————————————————————
+#  Span latency & token metrics
+# —————————————————————————————————————
+# One process-wide registry fed by:
+#   MyRunHooks       agent turns, tool calls, handoffs, per-agent token usage
+#   verdict_cache    guardrail judgements (cache hits timed separately)
+#   Models/          every LLM call per role, and time spent waiting on the
+#                    provider rate limiters
+#   run_turn         whole turns, by route
+#   prompt_profiler  prompt tokens per model call, by component
+# Each series keeps its last MAX_SAMPLES observations for p50/p95/p99. Export
+# is opt-in: METRICS_JSONL_PATH appends one line per span, METRICS_PROM_PATH
+# is rewritten with a Prometheus text snapshot. Both are flushed after every
+# turn and on shutdown. METRICS_VERBOSE=1 also prints each span.
+
+MAX_SAMPLES = 4096
+QUANTILES = (0.5, 0.95, 0.99)
+USAGE_FIELDS = ("requests", "input_tokens", "output_tokens", "total_tokens")
+
+
+# Name of the agent whose turn is running, per run. run_turn installs a fresh
+# holder before each run; the SDK calls hooks in child tasks, so MyRunHooks
+# updates the shared holder rather than setting the variable itself.
+_run_agent: ContextVar[Dict[str, str]] = ContextVar("run_agent")
+
+
+def begin_run(agent: str) -> None:
+    _run_agent.set({"name": agent})
+
+
+def set_current_agent(agent: str) -> None:
+    holder = _run_agent.get(None)
+    if holder is not None:
+        holder["name"] = agent
+
+
+def current_agent(default: str = "main") -> str:
+    holder = _run_agent.get(None)
+    return holder["name"] if holder else default
+
+
+def verbose() -> bool:
+    return os.getenv("METRICS_VERBOSE", "0") == "1"
+
+
+def usage_snapshot(usage: Any) -> Dict[str, int]:
+    return {field: getattr(usage, field, 0) or 0 for field in USAGE_FIELDS}
+
+
+class Series:
+    def __init__(self):
+        self.samples: Deque[float] = deque(maxlen=MAX_SAMPLES)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))]
+
+
+def label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    def __init__(self):
+        self._series: Dict[Tuple[str, str], Series] = defaultdict(Series)
+        self._usage: Dict[str, Counter] = defaultdict(Counter)
+        self._pending: List[Dict[str, Any]] = []
+        self._prompts: Dict[Tuple[str, str], Series] = defaultdict(Series)
+
+    def reset(self) -> None:
+        self._series.clear()
+        self._usage.clear()
+        self._pending.clear()
+        self._prompts.clear()
+
+    def observe(self, kind: str, name: str, seconds: float, **attrs: Any) -> None:
+        """
+        Record one span of `kind` ("agent", "tool", "handoff", "guardrail", ...).
+        """
+        self._series[(kind, name)].observe(seconds)
+        self._pending.append({"ts": round(time.time(), 3), "kind": kind, "name": name,
+                              "seconds": round(seconds, 4), **attrs})
+        if verbose():
+            print(f"### metrics: {kind} {name} {seconds * 1000:.0f}ms")
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attrs: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(kind, name, time.perf_counter() - started, **attrs)
+
+    def observe_prompt(self, caller: str, tokens: Dict[str, int], **attrs: Any) -> None:
+        """
+        Record the estimated prompt tokens of one model call, by component.
+        """
+        for component, count in tokens.items():
+            self._prompts[(caller, component)].observe(count)
+        self._prompts[(caller, "total")].observe(sum(tokens.values()))
+        self._pending.append({"ts": round(time.time(), 3), "kind": "prompt", "name": caller,
+                              "tokens": tokens, **attrs})
+
+    def prompt_summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        out: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(dict)
+        for (caller, component), series in sorted(self._prompts.items()):
+            out[caller][component] = {
+                "calls": series.count,
+                "avg": round(series.total / series.count, 1) if series.count else 0,
+                "p95": series.quantile(0.95),
+                "max": max(series.samples, default=0),
+            }
+        return dict(out)
+
+    def add_usage(self, agent: str, delta: Dict[str, int]) -> None:
+        self._usage[agent].update({k: v for k, v in delta.items() if v})
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        out: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(dict)
+        for (kind, name), series in sorted(self._series.items()):
+            out[kind][name] = {
+                "count": series.count,
+                "sum_s": round(series.total, 3),
+                **{f"p{int(q * 100)}_s": round(series.quantile(q), 3) for q in QUANTILES},
+            }
+        return dict(out)
+
+    def usage(self) -> Dict[str, Dict[str, int]]:
+        return {agent: dict(counts) for agent, counts in self._usage.items()}
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP sra_span_seconds Latency of agent turns, tool calls, handoffs, guardrails and LLM calls.",
+            "# TYPE sra_span_seconds summary",
+        ]
+        for (kind, name), series in sorted(self._series.items()):
+            labels = f'kind="{label_value(kind)}",name="{label_value(name)}"'
+            for q in QUANTILES:
+                lines.append(f'sra_span_seconds{{{labels},quantile="{q}"}} {series.quantile(q):.6f}')
+            lines.append(f"sra_span_seconds_sum{{{labels}}} {series.total:.6f}")
+            lines.append(f"sra_span_seconds_count{{{labels}}} {series.count}")
+        lines += [
+            "# HELP sra_llm_requests_total Model requests made by each agent.",
+            "# TYPE sra_llm_requests_total counter",
+        ]
+        for agent, counts in sorted(self._usage.items()):
+            lines.append(f'sra_llm_requests_total{{agent="{label_value(agent)}"}} {counts["requests"]}')
+        lines += [
+            "# HELP sra_tokens_total Tokens used by each agent.",
+            "# TYPE sra_tokens_total counter",
+        ]
+        for agent, counts in sorted(self._usage.items()):
+            for field in ("input_tokens", "output_tokens"):
+                lines.append(f'sra_tokens_total{{agent="{label_value(agent)}",type="{field[:-7]}"}} {counts[field]}')
+        lines += [
+            "# HELP sra_prompt_tokens Estimated prompt tokens per model call, by component.",
+            "# TYPE sra_prompt_tokens summary",
+        ]
+        for (caller, component), series in sorted(self._prompts.items()):
+            labels = f'caller="{label_value(caller)}",component="{component}"'
+            for q in QUANTILES:
+                lines.append(f'sra_prompt_tokens{{{labels},quantile="{q}"}} {series.quantile(q)}')
+            lines.append(f"sra_prompt_tokens_sum{{{labels}}} {series.total:.0f}")
+            lines.append(f"sra_prompt_tokens_count{{{labels}}} {series.count}")
+        return "\n".join(lines) + "\n"
+
+    async def flush(self) -> None:
+        """
+        Append pending spans to METRICS_JSONL_PATH and rewrite METRICS_PROM_PATH.
+        """
+        pending, self._pending = self._pending, []
+        jsonl_path = os.getenv("METRICS_JSONL_PATH")
+        if jsonl_path and pending:
+            import aiofiles  # only needed when exporting
+
+            Path(jsonl_path).parent.mkdir(parents=True, exist_ok=True)
+            async with aiofiles.open(jsonl_path, "a") as f:
+                await f.write("".join(json.dumps(span) + "\n" for span in pending))
+        prom_path = os.getenv("METRICS_PROM_PATH")
+        if prom_path:
+            await asyncio.to_thread(self._write_prometheus, Path(prom_path))
+
+    def _write_prometheus(self, path: Path) -> None:
+        # Written aside and renamed so a scraper never reads a partial file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def report(self) -> None:
+        for kind, names in self.summary().items():
+            for name, s in names.items():
+                print(f"### {kind} {name}: n={s['count']} p50 {s['p50_s']:.2f}s "
+                      f"p95 {s['p95_s']:.2f}s p99 {s['p99_s']:.2f}s")
+        for agent, counts in self.usage().items():
+            print(f"### {agent}: {counts.get('requests', 0)} request(s), "
+                  f"{counts.get('input_tokens', 0)} in / {counts.get('output_tokens', 0)} out tokens")
+        for caller, components in self.prompt_summary().items():
+            parts = ", ".join(f"{c} {s['avg']:.0f}" for c, s in components.items() if c != "total" and s["avg"])
+            total = components["total"]
+            print(f"### prompt {caller}: {total['calls']} call(s), avg {total['avg']:.0f} / "
+                  f"max {total['max']} tokens ({parts})")
+
+
+metrics = Metrics()
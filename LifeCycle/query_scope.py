@@ -0,0 +1,156 @@
+import os
+import time
+import asyncio
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, List, Optional, TypeVar
+from LifeCycle.metrics import metrics
+
+# —————————————————————————————————————
+#  Per-query deadline & cancellation scope
+# —————————————————————————————————————
+# run_turn opens one QueryScope per query and makes it current while the
+# streamed run is started, so every task the SDK spawns for that run (model
+# calls, guardrail judges, tools) sees it through a ContextVar. The scope is
+# cancelled when:
+#   - QUERY_TIMEOUT (default 180s, 0 disables) passes;
+#   - an input or output guardrail trips (see cancel_on_trip);
+#   - the consumer goes away (client disconnect, closed generator).
+# Cancelling stops the streamed run at once, which cancels in-flight model
+# calls, judge runs and search_web calls, their HTTP requests and their
+# rate-limiter waits. Model-call timeouts and retry backoffs are also capped
+# by the time the query has left.
+
+T = TypeVar("T")
+
+_current: ContextVar[Optional["QueryScope"]] = ContextVar("query_scope", default=None)
+
+
+class QueryCancelled(Exception):
+    def __init__(self, reason: str):
+        super().__init__(f"query cancelled: {reason}")
+        self.reason = reason
+
+
+def query_timeout() -> Optional[float]:
+    seconds = float(os.getenv("QUERY_TIMEOUT", "180"))
+    return seconds if seconds > 0 else None
+
+
+class QueryScope:
+    def __init__(self, timeout: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        self.timeout = timeout
+        self.deadline = loop.time() + timeout if timeout else None
+        self.reason: Optional[str] = None
+        self._started = time.perf_counter()
+        self._closed = False
+        self._cancelled = loop.create_future()
+        self._callbacks: List[Callable[[], None]] = []
+        self._timer = loop.call_at(self.deadline, self.cancel, "timeout") if self.deadline else None
+
+    def remaining(self) -> Optional[float]:
+        """
+        Seconds left before the deadline, or None without one.
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - asyncio.get_running_loop().time())
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        self._callbacks.append(callback)
+
+    def cancel(self, reason: str) -> None:
+        """
+        Cancel the query's outstanding work. The first reason sticks; calls
+        after the scope was closed are ignored.
+        """
+        if self._closed or self.reason is not None:
+            return
+        self.reason = reason
+        self._cancelled.set_result(reason)
+        metrics.observe("cancelled", reason, time.perf_counter() - self._started)
+        for callback in self._callbacks:
+            callback()
+
+    def close(self) -> None:
+        self._closed = True
+        self._callbacks.clear()
+        if self._timer is not None:
+            self._timer.cancel()
+
+    async def iterate(self, source: AsyncIterator[T]) -> AsyncIterator[T]:
+        """
+        Yield from `source` until it ends. If the scope is cancelled meanwhile,
+        the pending step is cancelled and QueryCancelled raised, even when
+        `source` itself would wait forever.
+        """
+        iterator = source.__aiter__()
+        while True:
+            if self.reason is not None:
+                raise QueryCancelled(self.reason)
+            step = asyncio.ensure_future(iterator.__anext__())
+            try:
+                await asyncio.wait({step, self._cancelled}, return_when=asyncio.FIRST_COMPLETED)
+            except BaseException:
+                step.cancel()
+                raise
+            if self.reason is not None:
+                step.cancel()
+                await asyncio.gather(step, return_exceptions=True)
+                raise QueryCancelled(self.reason)
+            try:
+                item = step.result()
+            except StopAsyncIteration:
+                return
+            yield item
+
+
+def current_scope() -> Optional[QueryScope]:
+    return _current.get()
+
+
+def time_left() -> Optional[float]:
+    """
+    Seconds the current query has left, or None outside a scope/deadline.
+    """
+    scope = _current.get()
+    return scope.remaining() if scope is not None else None
+
+
+@contextmanager
+def activate(scope: QueryScope):
+    """
+    Make `scope` current for tasks created inside the block. Keep the block
+    free of awaits/yields: run_turn is an async generator, so it may resume
+    in a different context.
+    """
+    token = _current.set(scope)
+    try:
+        yield scope
+    finally:
+        _current.reset(token)
+
+
+def cancel_on_trip(guardrail, reason: str):
+    """
+    Wrap an SDK input/output guardrail so a tripped wire cancels the current
+    query right away instead of when the stream next yields. Returns it.
+    """
+    function = guardrail.guardrail_function
+    if getattr(function, "cancels_query", False):
+        return guardrail
+
+    async def checked(*args):
+        output = function(*args)
+        if inspect.isawaitable(output):
+            output = await output
+        scope = _current.get()
+        if output.tripwire_triggered and scope is not None:
+            scope.cancel(reason)
+        return output
+
+    checked.cancels_query = True
+    guardrail.guardrail_function = checked
+    return guardrail
@@ -1,62 +1,62 @@
-from agents import RunHooks, RunContextWrapper
-from typing import Any
+from agents import RunHooks, RunContextWrapper, Agent, Tool
+from typing import Any, Dict, List, Optional, Tuple
+import time
+from LifeCycle.metrics import metrics, usage_snapshot, set_current_agent
+
+# —————————————————————————————————————
+#  Run-wide instrumentation
+# —————————————————————————————————————
+# One MyRunHooks per Runner.run_streamed call. It times every span of the run
+# and reports it to LifeCycle/metrics.py:
+#   agent     on_agent_start → on_handoff (from that agent) or on_agent_end
+#   handoff   on_handoff → on_agent_start of the receiving agent
+#   tool      on_tool_start → on_tool_end
+# Token usage is taken as the change in context.usage over each agent span.
 
 class MyRunHooks(RunHooks):
     def __init__(self):
-        self.event_counts = {
-            'on_run_start': 0,
-            'on_run_end': 0,
-            'on_run_exception': 0,
-        }
+        self.event_counts = {k: 0 for k in [
+            'on_agent_start', 'on_agent_end', 'on_handoff', 'on_tool_start', 'on_tool_end',
+        ]}
         self.name = "MyRunHooks"
-
-    async def on_run_start(self, context: RunContextWrapper) -> None:
-        self.event_counts['on_run_start'] += 1
-        print(f"### {self.name}: Run started. Count: {self.event_counts['on_run_start']}. Usage: {context.usage}")
-
-    async def on_run_end(self, context: RunContextWrapper, output: Any) -> None:
-        self.event_counts['on_run_end'] += 1
-        print("--- Agent run finished ---")
-        print(f"Final result: {output}")
-        # Extract and format RunResult details
-        if hasattr(output, 'last_agent'):
-            print(f"- Last agent: {output.last_agent}")
-        if hasattr(output, 'final_output'):
-            print(f"- Final output (str):\n    {output.final_output}")
-        if hasattr(output, 'new_items'):
-            print(f"- {len(output.new_items)} new item(s)")
-        if hasattr(output, 'raw_responses'):
-            print(f"- {len(output.raw_responses)} raw response(s)")
-        if hasattr(output, 'input_guardrail_results'):
-            print(f"- {len(output.input_guardrail_results)} input guardrail result(s)")
-        if hasattr(output, 'output_guardrail_results'):
-            print(f"- {len(output.output_guardrail_results)} output guardrail result(s)")
-        print("(See `RunResult` for more details)")
-
-    async def on_run_exception(self, context: RunContextWrapper, exception: Exception) -> None:
-        self.event_counts['on_run_exception'] += 1
-        print(f"### {self.name}: Run exception: {exception}. Count: {self.event_counts['on_run_exception']}. Usage: {context.usage}")
-
-    # async def on_handoff(self, context: RunContextWrapper, handoff_event: Any, **kwargs) -> None:
-    #     self.event_counts['on_handoff'] += 1
-    #     print(f"### {self.name}: Handoff event: {handoff_event}. Count: {self.event_counts['on_handoff']}")
-
-    async def on_tool_call(self, context: RunContextWrapper, tool_call_event: Any, **kwargs) -> None:
-        self.event_counts['on_tool_call'] += 1
-        print(f"### {self.name}: Tool call event: {tool_call_event}. Count: {self.event_counts['on_tool_call']}")
-
-    async def on_tool_result(self, context: RunContextWrapper, tool_result_event: Any, **kwargs) -> None:
-        self.event_counts['on_tool_result'] += 1
-        print(f"### {self.name}: Tool result event: {tool_result_event}. Count: {self.event_counts['on_tool_result']}")
-
-    async def on_message(self, context: RunContextWrapper, message_event: Any, **kwargs) -> None:
-        self.event_counts['on_message'] += 1
-        print(f"### {self.name}: Message event: {message_event}. Count: {self.event_counts['on_message']}")
-
-    async def on_thought(self, context: RunContextWrapper, thought_event: Any, **kwargs) -> None:
-        self.event_counts['on_thought'] += 1
-        print(f"### {self.name}: Thought event: {thought_event}. Count: {self.event_counts['on_thought']}")
-
-    async def on_action(self, context: RunContextWrapper, action_event: Any, **kwargs) -> None:
-        self.event_counts['on_action'] += 1
-        print(f"### {self.name}: Action event: {action_event}. Count: {self.event_counts['on_action']}")
\ No newline at end of file
+        self._agent: Optional[Tuple[str, float, Dict[str, int]]] = None
+        self._handoff: Optional[Tuple[str, float]] = None
+        self._tools: Dict[Tuple[str, str], List[float]] = {}
+
+    def _close_agent(self, context: RunContextWrapper, agent: Agent) -> None:
+        if self._agent is None or self._agent[0] != agent.name:
+            return
+        name, started, usage_before = self._agent
+        usage_after = usage_snapshot(context.usage)
+        delta = {k: usage_after[k] - usage_before[k] for k in usage_after}
+        metrics.add_usage(name, delta)
+        metrics.observe("agent", name, time.perf_counter() - started, **delta)
+        self._agent = None
+
+    async def on_agent_start(self, context: RunContextWrapper, agent: Agent) -> None:
+        self.event_counts['on_agent_start'] += 1
+        if self._handoff is not None:
+            label, started = self._handoff
+            metrics.observe("handoff", f"{label}->{agent.name}", time.perf_counter() - started)
+            self._handoff = None
+        self._agent = (agent.name, time.perf_counter(), usage_snapshot(context.usage))
+        set_current_agent(agent.name)  # attributes this agent's prompts in Models/prompt_profiler.py
+
+    async def on_agent_end(self, context: RunContextWrapper, agent: Agent, output: Any) -> None:
+        self.event_counts['on_agent_end'] += 1
+        self._close_agent(context, agent)
+
+    async def on_handoff(self, context: RunContextWrapper, from_agent: Agent, to_agent: Agent) -> None:
+        self.event_counts['on_handoff'] += 1
+        self._close_agent(context, from_agent)
+        self._handoff = (from_agent.name, time.perf_counter())
+
+    async def on_tool_start(self, context: RunContextWrapper, agent: Agent, tool: Tool) -> None:
+        self.event_counts['on_tool_start'] += 1
+        self._tools.setdefault((agent.name, tool.name), []).append(time.perf_counter())
+
+    async def on_tool_end(self, context: RunContextWrapper, agent: Agent, tool: Tool, result: str) -> None:
+        self.event_counts['on_tool_end'] += 1
+        starts = self._tools.get((agent.name, tool.name))
+        if starts:
+            metrics.observe("tool", tool.name, time.perf_counter() - starts.pop(0), agent=agent.name)
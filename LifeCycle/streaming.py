@@ -0,0 +1,111 @@
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+from Context.history import estimate_tokens
+
+# —————————————————————————————————————
+#  Streaming text & perceived latency
+# —————————————————————————————————————
+# run_turn feeds every raw_response_event through a StreamRecorder. Text
+# deltas are buffered per model call, so the message written to history
+# is exactly what the user saw stream by. Each model call becomes one
+# sample: time-to-first-token measured from the start of the call (run start,
+# agent switch, or the tool output that triggered the next call) and output
+# tokens per second over the streaming window.
+
+TEXT_DELTA = "response.output_text.delta"
+COMPLETED = "response.completed"
+
+
+class StreamRecorder:
+    def __init__(self, agent: str):
+        self.agent = agent
+        self._chunks: List[str] = []
+        self._started = time.perf_counter()
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+        self._output_tokens: Optional[int] = None
+
+    def begin(self, agent: Optional[str] = None) -> None:
+        """
+        Start timing a new model call (after an agent switch or a tool result).
+        """
+        if agent is not None:
+            self.agent = agent
+        self._chunks = []
+        self._started = time.perf_counter()
+        self._first = self._last = None
+        self._output_tokens = None
+
+    def feed(self, data: Any) -> Optional[str]:
+        """
+        Consume one raw response event; return its text delta, if any.
+        """
+        kind = getattr(data, "type", None)
+        if kind == TEXT_DELTA and getattr(data, "delta", ""):
+            now = time.perf_counter()
+            if self._first is None:
+                self._first = now
+            self._last = now
+            self._chunks.append(data.delta)
+            return data.delta
+        if kind == COMPLETED:
+            usage = getattr(getattr(data, "response", None), "usage", None)
+            self._output_tokens = getattr(usage, "output_tokens", None) or None
+        return None
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """
+        Close the current model call and record its sample. Returns None when
+        nothing was streamed (e.g. a call that only produced tool calls).
+        """
+        if self._first is None:
+            return None
+        tokens = self._output_tokens or estimate_tokens(self.text)
+        window = self._last - self._first
+        sample = {
+            "agent": self.agent,
+            "ttft_s": round(self._first - self._started, 3),
+            "tokens": tokens,
+            "tokens_per_s": round(tokens / window, 1) if window > 0 else None,
+        }
+        stream_stats.record(sample)
+        self.begin()
+        return sample
+
+
+class StreamStats:
+    """
+    Process-wide per-agent aggregates of StreamRecorder samples, kept as
+    running totals so memory stays constant however long the process runs.
+    """
+
+    def __init__(self):
+        self._totals: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, sample: Dict[str, Any]) -> None:
+        totals = self._totals[sample["agent"]]
+        totals["calls"] += 1
+        totals["ttft_sum"] += sample["ttft_s"]
+        totals["ttft_max"] = max(totals["ttft_max"], sample["ttft_s"])
+        if sample["tokens_per_s"] is not None:
+            totals["rates"] += 1
+            totals["rate_sum"] += sample["tokens_per_s"]
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            agent: {
+                "calls": t["calls"],
+                "ttft_avg_s": round(t["ttft_sum"] / t["calls"], 3),
+                "ttft_max_s": t["ttft_max"],
+                "tokens_per_s_avg": round(t["rate_sum"] / t["rates"], 1) if t["rates"] else None,
+            }
+            for agent, t in self._totals.items()
+        }
+
+
+stream_stats = StreamStats()
@@ -0,0 +1,194 @@
+import os
+import asyncio
+from collections import Counter, deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+from LifeCycle.query_scope import time_left
+
+# —————————————————————————————————————
+#  Hedged model calls & per-role timeouts
+# —————————————————————————————————————
+# Every model call in a query is sequential, so one slow call sets the end-to-
+# end latency. RoleModel therefore:
+#   - bounds each attempt by a per-role timeout (LLM_TIMEOUT_MAIN 60s,
+#     LLM_TIMEOUT_GUARDRAIL 20s, LLM_TIMEOUT_BACKGROUND 120s), or by what is
+#     left of the query's deadline; a timed-out attempt is retried like any
+#     transient error;
+#   - hedges: if the primary call has not answered (streams: produced their
+#     first event) by the HEDGE_PERCENTILE (0.95) of that role's recent
+#     latencies, a backup request is fired, to HEDGE_MODEL_<ROLE> if set, and
+#     whichever answers first wins; the other is cancelled.
+# Hedging starts once HEDGE_MIN_SAMPLES (20) latencies were seen for the role
+# and call type; HEDGE=0 turns it off. Backups go through the same rate
+# limiter, so they cost at most ~5% extra calls at the default percentile.
+
+T = TypeVar("T")
+
+DEFAULT_TIMEOUTS = {"main": "60", "guardrail": "20", "background": "120"}
+
+hedge_stats: Counter = Counter()
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+_trackers: Dict[Tuple[str, str], LatencyTracker] = {}
+
+
+def tracker(role: str, kind: str) -> LatencyTracker:
+    return _trackers.setdefault((role, kind), LatencyTracker())
+
+
+def role_timeout(role: str) -> float:
+    """
+    Per-attempt timeout for `role`, capped by the current query's deadline.
+    """
+    timeout = float(os.getenv(f"LLM_TIMEOUT_{role.upper()}", DEFAULT_TIMEOUTS.get(role, "60")))
+    left = time_left()
+    return min(timeout, left) if left is not None else timeout
+
+
+def hedge_delay(role: str, kind: str) -> Optional[float]:
+    """
+    Seconds to wait before firing a backup, or None to not hedge (yet).
+    """
+    if os.getenv("HEDGE", "1") == "0":
+        return None
+    samples = tracker(role, kind)
+    if len(samples.samples) < max(1, int(os.getenv("HEDGE_MIN_SAMPLES", "20"))):
+        return None
+    return samples.percentile(float(os.getenv("HEDGE_PERCENTILE", "0.95")))
+
+
+async def _cancel(tasks) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def hedged(
+    primary: Callable[[], Awaitable[T]],
+    backup: Callable[[], Awaitable[T]],
+    delay: Optional[float],
+    label: str,
+) -> T:
+    """
+    Await `primary`; if it is still running after `delay`, also start `backup`
+    and return whichever succeeds first. Raises the primary's error only if
+    both fail.
+    """
+    first = asyncio.ensure_future(primary())
+    if delay is None:
+        return await first
+    second = None
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        hedge_stats[f"{label} fired"] += 1
+        second = asyncio.ensure_future(backup())
+        pending = {first, second}
+        errors = {}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        hedge_stats[f"{label} backup won"] += 1
+                    await _cancel(pending)
+                    return task.result()
+                errors[task] = task.exception()
+        raise errors.get(first) or errors[second]
+    except BaseException:
+        await _cancel([t for t in (first, second) if t is not None and not t.done()])
+        raise
+
+
+async def _pump(index: int, open_stream: Callable[[], AsyncIterator[Any]], queue: asyncio.Queue) -> None:
+    # The whole stream runs in this one task: the SDK sets and resets span
+    # ContextVars around it, which must happen in the same Context.
+    try:
+        async for event in open_stream():
+            queue.put_nowait((index, "event", event))
+    except Exception as e:
+        queue.put_nowait((index, "error", e))
+        return
+    queue.put_nowait((index, "end", None))
+
+
+async def hedged_stream(
+    primary: Callable[[], AsyncIterator[Any]],
+    backup: Callable[[], AsyncIterator[Any]],
+    delay: Optional[float],
+    first_timeout: float,
+    label: str,
+) -> AsyncIterator[Any]:
+    """
+    Stream from `primary`; if it has not produced its first event after
+    `delay`, also open `backup` and continue with whichever produces a first
+    event first. Raises asyncio.TimeoutError if no stream starts within
+    `first_timeout`. Without a delay the stream is iterated directly.
+    """
+    if delay is None:
+        stream = primary()
+        try:
+            try:
+                async with asyncio.timeout(first_timeout):
+                    event = await stream.__anext__()
+            except StopAsyncIteration:
+                return
+            yield event
+            async for event in stream:
+                yield event
+        finally:
+            await stream.aclose()
+        return
+
+    queue: asyncio.Queue = asyncio.Queue()
+    pumps: List[asyncio.Task] = []
+
+    def start(open_stream: Callable[[], AsyncIterator[Any]]) -> None:
+        pumps.append(asyncio.ensure_future(_pump(len(pumps), open_stream, queue)))
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + first_timeout
+    start(primary)
+    try:
+        errors = []
+        while True:
+            hedge_at = min(deadline, loop.time() + delay) if len(pumps) == 1 else deadline
+            try:
+                index, kind, payload = await asyncio.wait_for(queue.get(), max(0.0, hedge_at - loop.time()))
+            except asyncio.TimeoutError:
+                if loop.time() >= deadline:
+                    raise asyncio.TimeoutError(f"no response within {first_timeout:g}s")
+                hedge_stats[f"{label} fired"] += 1
+                start(backup)
+                continue
+            if kind != "error":
+                break
+            errors.append(payload)
+            if len(errors) == len(pumps):  # every stream started so far failed
+                raise errors[0]
+        winner = index
+        await _cancel([p for i, p in enumerate(pumps) if i != winner])
+        if winner == 1:
+            hedge_stats[f"{label} backup won"] += 1
+
+        while kind == "event":
+            yield payload
+            index, kind, payload = await queue.get()
+            while index != winner:
+                index, kind, payload = await queue.get()
+        if kind == "error":
+            raise payload
+    finally:
+        await _cancel([p for p in pumps if not p.done()])
@@ -0,0 +1,195 @@
+import os
+import json
+import copy
+from typing import Any, Dict, List, Tuple
+from Context.history import estimate_tokens
+from Tool.compaction import truncate_tokens
+from LifeCycle.metrics import metrics, current_agent
+
+# —————————————————————————————————————
+#  Prompt token profiler & budgets
+# —————————————————————————————————————
+# RoleModel runs every model call's arguments through profile_call before
+# sending them. The prompt is split into components and each is counted:
+#   instructions  system prompt (incl. the dynamic_context_wrapper snapshot)
+#   history       input items up to and including the latest user message
+#   handoff       what earlier agents in this run passed along: their messages
+#                 and handoff tool calls (what survives remove_all_tools)
+#   tool_output   function call arguments and results of regular tools
+#   judged        everything a guardrail judge receives
+#   schemas       tool, handoff and output JSON schemas
+# Counts go to LifeCycle/metrics.py per caller (agent name, or "guardrail" /
+# "background") and to METRICS_JSONL_PATH. PROMPT_BUDGET_<COMPONENT> and
+# PROMPT_BUDGET_TOTAL (default 8000) set token budgets; PROMPT_BUDGET_MODE=warn
+# (default) prints when one is exceeded, "truncate" also cuts the offending
+# component (oldest history first, other text from the end). Instructions and
+# schemas are never cut.
+
+PARAMS = ("system_instructions", "input", "model_settings", "tools", "output_schema", "handoffs", "tracing")
+COMPONENTS = ("instructions", "history", "handoff", "tool_output", "judged", "schemas")
+TRUNCATABLE = ("history", "handoff", "tool_output", "judged")
+
+
+def budgets() -> Dict[str, int]:
+    limits = {"total": int(os.getenv("PROMPT_BUDGET_TOTAL", "8000"))}
+    for component in TRUNCATABLE + ("instructions",):
+        value = os.getenv(f"PROMPT_BUDGET_{component.upper()}")
+        if value:
+            limits[component] = int(value)
+    return {k: v for k, v in limits.items() if v > 0}
+
+
+def item_text(item: Any) -> str:
+    if isinstance(item, str):
+        return item
+    if not isinstance(item, dict):
+        item = getattr(item, "model_dump", lambda: {})()
+    if item.get("type") == "function_call":
+        return f"{item.get('name', '')}({item.get('arguments', '')})"
+    if item.get("type") == "function_call_output":
+        output = item.get("output", "")
+        return output if isinstance(output, str) else json.dumps(output)
+    content = item.get("content", "")
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content or "")
+
+
+def schema_tokens(tools: Any, output_schema: Any, handoffs: Any) -> int:
+    parts = []
+    for tool in tools or []:
+        parts.append(getattr(tool, "name", "") + getattr(tool, "description", ""))
+        parts.append(json.dumps(getattr(tool, "params_json_schema", {})))
+    for handoff in handoffs or []:
+        parts.append(getattr(handoff, "tool_name", "") + getattr(handoff, "tool_description", ""))
+        parts.append(json.dumps(getattr(handoff, "input_json_schema", {})))
+    if output_schema is not None and hasattr(output_schema, "json_schema"):
+        try:
+            parts.append(json.dumps(output_schema.json_schema()))
+        except Exception:
+            pass  # plain-text output
+    return estimate_tokens("".join(parts))
+
+
+def classify(items: List[Any], handoff_names: set, judge: bool) -> List[str]:
+    """
+    Component of each input item.
+    """
+    if judge:
+        return ["judged"] * len(items)
+    roles = [item.get("role") if isinstance(item, dict) else None for item in items]
+    last_user = max((i for i, role in enumerate(roles) if role == "user"), default=-1)
+    handoff_calls = {
+        item.get("call_id") for item in items
+        if isinstance(item, dict) and item.get("type") == "function_call" and item.get("name") in handoff_names
+    }
+    labels = []
+    for i, item in enumerate(items):
+        kind = item.get("type") if isinstance(item, dict) else None
+        if i <= last_user:
+            labels.append("history")
+        elif kind in ("function_call", "function_call_output"):
+            labels.append("handoff" if item.get("call_id") in handoff_calls else "tool_output")
+        else:
+            labels.append("handoff")
+    return labels
+
+
+def truncate_items(items: List[Any], labels: List[str], component: str, excess: int) -> List[Any]:
+    """
+    Cut about `excess` tokens from `component`: drop the oldest history items
+    (never the latest user message), or shorten the longest texts.
+    """
+    items = list(items)
+    indexes = [i for i, label in enumerate(labels) if label == component]
+    if component == "history":
+        last_user = indexes[-1] if indexes else -1
+        for i in indexes:
+            if excess <= 0 or i == last_user:
+                break
+            excess -= estimate_tokens(item_text(items[i]))
+            items[i] = None
+        # A tool call and its output must be dropped together
+        kept = {item.get("call_id") for item in items if isinstance(item, dict) and item.get("type") == "function_call"}
+        return [
+            item for item in items if item is not None
+            and not (isinstance(item, dict) and item.get("type") == "function_call_output"
+                     and item.get("call_id") not in kept)
+        ]
+    for i in sorted(indexes, key=lambda i: -len(item_text(items[i]))):
+        if excess <= 0:
+            break
+        text = item_text(items[i])
+        keep = max(estimate_tokens(text) - excess, 32)
+        shortened = truncate_tokens(text, keep)
+        excess -= estimate_tokens(text) - estimate_tokens(shortened)
+        items[i] = replace_text(items[i], shortened)
+    return items
+
+
+def replace_text(item: Any, text: str) -> Any:
+    if isinstance(item, str):
+        return text
+    item = copy.deepcopy(item)
+    if item.get("type") == "function_call_output":
+        item["output"] = text
+    elif item.get("type") == "function_call":
+        pass  # arguments must stay valid JSON
+    elif isinstance(item.get("content"), list):
+        item["content"] = [{**item["content"][0], "text": text}] if item["content"] else []
+    else:
+        item["content"] = text
+    return item
+
+
+def profile_call(role: str, args: Tuple, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Count the prompt of one model call, record it, enforce budgets and return
+    the call's arguments as keywords (possibly with a truncated input).
+    """
+    call = dict(zip(PARAMS, args), **kwargs)
+    raw_input = call.get("input")
+    items = [raw_input] if isinstance(raw_input, str) else list(raw_input or [])
+    handoff_names = {getattr(h, "tool_name", None) for h in call.get("handoffs") or []}
+    labels = classify(items, handoff_names, judge=role == "guardrail")
+
+    def count(items: List[Any], labels: List[str]) -> Dict[str, int]:
+        tokens = dict.fromkeys(COMPONENTS, 0)
+        tokens["instructions"] = estimate_tokens(call.get("system_instructions") or "")
+        tokens["schemas"] = schema_tokens(call.get("tools"), call.get("output_schema"), call.get("handoffs"))
+        for item, label in zip(items, labels):
+            tokens[label] += estimate_tokens(item_text(item))
+        return tokens
+
+    name = current_agent() if role == "main" else role
+    tokens = count(items, labels)
+    total = sum(tokens.values())
+    over = [
+        (component, limit) for component, limit in budgets().items()
+        if (total if component == "total" else tokens.get(component, 0)) > limit
+    ]
+    for component, limit in over:
+        used = total if component == "total" else tokens[component]
+        print(f"### prompt budget: {name} {component} {used} > {limit} tokens")
+
+    if over and os.getenv("PROMPT_BUDGET_MODE", "warn") == "truncate":
+        for component, limit in sorted(over, key=lambda o: o[0] == "total"):  # total last
+            if component == "total":
+                # Cut the largest truncatable components until the total fits
+                parts = sorted(TRUNCATABLE, key=lambda c: -tokens[c])
+            elif component in TRUNCATABLE:
+                parts = [component]
+            else:
+                continue
+            for part in parts:
+                excess = (total if component == "total" else tokens[component]) - limit
+                if excess <= 0:
+                    break
+                items = truncate_items(items, labels, part, excess)
+                labels = classify(items, handoff_names, judge=role == "guardrail")
+                tokens = count(items, labels)
+                total = sum(tokens.values())
+        call["input"] = items[0] if isinstance(raw_input, str) and items else items
+
+    metrics.observe_prompt(name, tokens, over=[component for component, _ in over])
+    return call
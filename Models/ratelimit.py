@@ -0,0 +1,226 @@
+import os
+import time
+import heapq
+import random
+import asyncio
+import itertools
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+import httpx
+import openai
+from LifeCycle.metrics import metrics
+from LifeCycle.query_scope import time_left
+
+# —————————————————————————————————————
+#  Shared rate limiting & retry scheduling
+# —————————————————————————————————————
+# One token bucket per provider ("gemini", "tavily") shared by every agent,
+# guardrail judge and search_web call in the process. Waiters are served by
+# priority, so user-facing agent turns go ahead of guardrail judges and
+# background work. Failed calls are retried with exponential backoff; a 429
+# with Retry-After pauses the whole bucket so every caller backs off together.
+
+T = TypeVar("T")
+
+PRIORITY_USER = 0
+PRIORITY_GUARDRAIL = 1
+PRIORITY_BACKGROUND = 2
+
+# provider -> (requests/sec env, default, burst env, default)
+PROVIDER_LIMITS = {
+    "gemini": ("GEMINI_RPS", "10", "GEMINI_BURST", "20"),
+    "tavily": ("TAVILY_RPS", "5", "TAVILY_BURST", "10"),
+}
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.granted = 0
+        self.throttled = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _ready(self) -> bool:
+        return self._tokens >= 1 and time.monotonic() >= self._paused_until
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stop granting tokens for `seconds` (e.g. after a 429 with Retry-After).
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = min(self._tokens, 0.0)
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._waiters and self._ready():
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue  # cancelled while waiting
+            self._tokens -= 1
+            self.granted += 1
+            future.set_result(None)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._timer is not None or not any(not f.done() for _, _, f in self._waiters):
+            return
+        delay = max(
+            self._paused_until - time.monotonic(),
+            (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0,
+            0.001,
+        )
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    async def acquire(self, priority: int = PRIORITY_USER) -> None:
+        """
+        Wait for a token. Lower `priority` values are served first.
+        """
+        self._refill()
+        if not self._waiters and self._ready():
+            self._tokens -= 1
+            self.granted += 1
+            return
+        self.throttled += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._schedule()
+        with metrics.span("ratelimit_wait", self.name):
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._tokens += 1  # granted just as we were cancelled: give it back
+                future.cancel()
+                raise
+
+
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def get_limiter(provider: str) -> TokenBucket:
+    if provider not in _buckets:
+        rate_env, rate, burst_env, burst = PROVIDER_LIMITS[provider]
+        _buckets[provider] = TokenBucket(
+            provider,
+            rate=float(os.getenv(rate_env, rate)),
+            burst=int(os.getenv(burst_env, burst)),
+        )
+    return _buckets[provider]
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Seconds to wait according to the error's Retry-After headers, if any.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    # asyncio.TimeoutError: a per-role timeout from Models/hedging.py
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError, httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    return status_code(error) in RETRYABLE_STATUS
+
+
+def backoff(attempt: int, error: BaseException) -> float:
+    hinted = retry_after(error)
+    if hinted is not None:
+        return hinted
+    base = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+    cap = float(os.getenv("RETRY_MAX_DELAY", "30"))
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def max_retries() -> int:
+    return int(os.getenv("MAX_RETRIES", "5"))
+
+
+def plan_retry(provider: str, attempt: int, error: BaseException, retries: int) -> Optional[float]:
+    """
+    Delay before retrying after `error`, or None if it should be raised.
+    A 429 also pauses the provider's bucket for everyone. No retry is planned
+    past the current query's deadline.
+    """
+    if attempt >= retries or not is_retryable(error):
+        return None
+    delay = backoff(attempt, error)
+    left = time_left()
+    if left is not None and delay >= left:
+        return None
+    if status_code(error) == 429:
+        get_limiter(provider).pause(delay)
+    print(f"### {provider}: {type(error).__name__} (status {status_code(error)}), "
+          f"retry {attempt + 1}/{retries} in {delay:.1f}s")
+    return delay
+
+
+async def call_with_retries(
+    provider: str,
+    call: Callable[[], Awaitable[T]],
+    priority: int = PRIORITY_USER,
+    retries: Optional[int] = None,
+) -> T:
+    """
+    Run `call` under the provider's rate limit, retrying transient failures
+    (429/5xx/connection errors) with exponential backoff that honors Retry-After.
+    """
+    bucket = get_limiter(provider)
+    retries = retries if retries is not None else max_retries()
+    for attempt in itertools.count():
+        await bucket.acquire(priority)
+        try:
+            return await call()
+        except Exception as e:
+            delay = plan_retry(provider, attempt, e, retries)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    return {
+        name: {"granted": b.granted, "throttled": b.throttled, "waiting": len(b._waiters)}
+        for name, b in _buckets.items()
+    }
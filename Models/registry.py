@@ -0,0 +1,196 @@
+import os
+import time
+import asyncio
+import itertools
+from typing import Any, Dict, Optional
+import httpx
+from openai import AsyncOpenAI
+from agents import Model, OpenAIChatCompletionsModel
+from LifeCycle.metrics import metrics
+from Models.hedging import hedged, hedged_stream, hedge_delay, role_timeout, tracker
+from Models.prompt_profiler import profile_call
+from Models.ratelimit import (
+    PRIORITY_USER,
+    PRIORITY_GUARDRAIL,
+    PRIORITY_BACKGROUND,
+    call_with_retries,
+    get_limiter,
+    max_retries,
+    plan_retry,
+)
+
+# —————————————————————————————————————
+#  Shared provider & model registry
+# —————————————————————————————————————
+# Every agent and guardrail judge gets its model handle from here, so the whole
+# process shares one AsyncOpenAI client and one pooled HTTP connection set.
+# Nothing is built at import time: the client is created on the first model
+# call, after .env has been loaded.
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+# role -> (env override, default model name)
+ROLE_MODELS = {
+    "main": ("MAIN_MODEL", "gemini-2.5-flash-lite-preview-06-17"),
+    "guardrail": ("GUARDRAIL_MODEL", "gemini-2.0-flash-exp"),
+    "background": ("BACKGROUND_MODEL", "gemini-2.0-flash-exp"),
+}
+# Queue position at the shared Gemini rate limiter (lower goes first).
+ROLE_PRIORITY = {
+    "main": PRIORITY_USER,
+    "guardrail": PRIORITY_GUARDRAIL,
+    "background": PRIORITY_BACKGROUND,
+}
+
+_client: Optional[AsyncOpenAI] = None
+_handles: Dict[str, "RoleModel"] = {}
+
+
+def get_client() -> AsyncOpenAI:
+    """
+    Return the shared Gemini client, creating it (and its pool) on first use.
+    """
+    global _client
+    if _client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+                max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "20")),
+                keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30")),
+            ),
+            timeout=httpx.Timeout(
+                float(os.getenv("LLM_TIMEOUT", "60")),
+                connect=float(os.getenv("LLM_CONNECT_TIMEOUT", "10")),
+            ),
+        )
+        _client = AsyncOpenAI(
+            api_key=os.getenv("GEMINI_API_KEY"),
+            base_url=os.getenv("GEMINI_BASE_URL", GEMINI_BASE_URL),
+            http_client=http_client,
+            max_retries=0,  # retries are scheduled by Models/ratelimit.py
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """
+    Close the shared client and its pooled connections.
+    """
+    global _client
+    if _client is not None:
+        await _client.close()
+    _client = None
+    for handle in _handles.values():
+        handle.reset()
+
+
+def model_name(role: str) -> str:
+    env, default = ROLE_MODELS[role]
+    return os.getenv(env, default)
+
+
+class RoleModel(Model):
+    """
+    Model handle for a role. The underlying OpenAIChatCompletionsModel is
+    built on the first call and bound to the shared client. Every call waits
+    for the shared Gemini rate limiter at the role's priority, each attempt is
+    bounded by the role's timeout, transient failures are retried with backoff
+    and slow calls are hedged with a backup request (Models/hedging.py).
+    """
+
+    def __init__(self, role: str):
+        self.role = role
+        self.priority = ROLE_PRIORITY[role]
+        self._model: Optional[OpenAIChatCompletionsModel] = None
+        self._backup: Optional[OpenAIChatCompletionsModel] = None
+
+    @property
+    def model(self) -> OpenAIChatCompletionsModel:
+        if self._model is None:
+            self._model = OpenAIChatCompletionsModel(
+                model=model_name(self.role),
+                openai_client=get_client(),
+            )
+        return self._model
+
+    @property
+    def backup(self) -> OpenAIChatCompletionsModel:
+        """
+        Model for hedged backup requests: HEDGE_MODEL_<ROLE> if set (e.g. a
+        faster model), otherwise the primary one.
+        """
+        name = os.getenv(f"HEDGE_MODEL_{self.role.upper()}")
+        if not name:
+            return self.model
+        if self._backup is None:
+            self._backup = OpenAIChatCompletionsModel(model=name, openai_client=get_client())
+        return self._backup
+
+    def reset(self) -> None:
+        self._model = None
+        self._backup = None
+
+    def _profiled(self, args: tuple, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return profile_call(self.role, args, kwargs)
+
+    async def get_response(self, *args: Any, **kwargs: Any):
+        kwargs = self._profiled(args, kwargs)
+        timeout = role_timeout(self.role)
+
+        def attempt(model: OpenAIChatCompletionsModel):
+            return call_with_retries(
+                "gemini", lambda: asyncio.wait_for(model.get_response(**kwargs), timeout), self.priority
+            )
+
+        started = time.perf_counter()
+        with metrics.span("llm", self.role):
+            response = await hedged(
+                lambda: attempt(self.model), lambda: attempt(self.backup),
+                hedge_delay(self.role, "response"), self.role,
+            )
+        tracker(self.role, "response").observe(time.perf_counter() - started)
+        return response
+
+    async def stream_response(self, *args: Any, **kwargs: Any):
+        # A stream can only be retried before its first event reached the caller.
+        kwargs = self._profiled(args, kwargs)
+        retries = max_retries()
+        started = time.perf_counter()
+
+        async def open_stream(model: OpenAIChatCompletionsModel):
+            await get_limiter("gemini").acquire(self.priority)
+            async for event in model.stream_response(**kwargs):
+                yield event
+
+        for attempt in itertools.count():
+            streaming = False
+            attempt_started = time.perf_counter()
+            try:
+                async for event in hedged_stream(
+                    lambda: open_stream(self.model), lambda: open_stream(self.backup),
+                    hedge_delay(self.role, "stream"), role_timeout(self.role), self.role,
+                ):
+                    if not streaming:
+                        tracker(self.role, "stream").observe(time.perf_counter() - attempt_started)
+                    streaming = True
+                    yield event
+                metrics.observe("llm", self.role, time.perf_counter() - started)
+                return
+            except Exception as e:
+                delay = None if streaming else plan_retry("gemini", attempt, e, retries)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+
+def get_model(role: str = "main") -> RoleModel:
+    """
+    Model handle for a role ("main" for the pipeline agents, "guardrail" for
+    the judges, "background" for housekeeping such as history folding).
+    Handles are shared, so every caller reuses the same client.
+    """
+    if role not in ROLE_MODELS:
+        raise ValueError(f"Unknown model role: '{role}'")
+    if role not in _handles:
+        _handles[role] = RoleModel(role)
+    return _handles[role]
@@ -0,0 +1,78 @@
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional
+from Guardrails.fast_path import has_profanity, has_hostile_words, is_greeting, research_topic
+from Cache.answer_cache import depends_on_history
+
+# —————————————————————————————————————
+#  Local intent router
+# —————————————————————————————————————
+# Decides, without a model call, where a turn should start:
+#   "greeting"  answered from a template, no agent runs
+#   "research"  Research_Agent starts directly, skipping the Triage_Agent turn
+#   "llm"       anything ambiguous goes through Triage_Agent as before
+# It reuses the guardrail fast-path lexicons: profanity and hostile words go
+# through Triage_Agent. A routed research turn skips only the Triage_Agent model
+# call. run_turn passes Triage_Agent's input guardrails in the RunConfig, because
+# the SDK runs input guardrails for the starting agent only, so the abuse judge
+# still checks every routed query. Follow-ups ("tell me about its economy",
+# "who is he") go through Triage_Agent too: a routed turn starts Research_Agent
+# with the bare query, without the history window.
+
+# Words that make a templated question about the conversation, not a topic.
+# References back to earlier turns ("it", "they", "that", ...) are caught by
+# depends_on_history, which shares its word list with the answer cache.
+PERSONAL_WORDS = {"i", "me", "my", "mine", "you", "your", "yours", "we", "our", "us"}
+MAX_TOPIC_WORDS = 12
+
+GREETING_REPLIES = (
+    (re.compile(r"^(thanks?|thank\s+you|thx)", re.IGNORECASE),
+     "You're welcome, {name}! Send me another topic whenever you like."),
+    (re.compile(r"^(bye|goodbye)", re.IGNORECASE),
+     "Goodbye, {name}! Type 'exit' to leave, or give me a new topic."),
+    (re.compile(r"^how\s+are\s+you", re.IGNORECASE),
+     "Doing great and ready to dig in, {name}! What should I research?"),
+)
+DEFAULT_GREETING = "Hi {name}! 👋 Tell me a topic and I'll research and summarize it for you."
+
+
+@dataclass(frozen=True)
+class Route:
+    kind: str
+    confidence: float
+    topic: Optional[str] = None
+    reply: Optional[str] = None
+
+
+def greeting_reply(text: str, name: str) -> str:
+    for pattern, reply in GREETING_REPLIES:
+        if pattern.match(text.strip()):
+            return reply.format(name=name)
+    return DEFAULT_GREETING.format(name=name)
+
+
+def classify(text: str, name: str = "there") -> Route:
+    if has_profanity(text) or has_hostile_words(text):
+        return Route("llm", 0.0)
+    if is_greeting(text):
+        return Route("greeting", 0.95, reply=greeting_reply(text, name))
+    topic = research_topic(text)
+    if topic is not None and not depends_on_history(text):
+        words = re.findall(r"\w+", topic.lower())
+        if words and len(words) <= MAX_TOPIC_WORDS and not PERSONAL_WORDS & set(words):
+            return Route("research", 0.9, topic=topic)
+    return Route("llm", 0.0)
+
+
+def route_intent(text: str, name: str = "there") -> Route:
+    """
+    Route a turn, falling back to "llm" unless the local decision clears
+    ROUTER_MIN_CONFIDENCE. Set ROUTER_ENABLED=0 to always use Triage_Agent.
+    """
+    if os.getenv("ROUTER_ENABLED", "1") == "0":
+        return Route("llm", 0.0)
+    route = classify(text, name)
+    if route.kind != "llm" and route.confidence < float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.85")):
+        return Route("llm", route.confidence)
+    return route
@@ -0,0 +1,116 @@
+import os
+import re
+import hashlib
+from typing import Dict, List, Set
+from Context.history import estimate_tokens, CHARS_PER_TOKEN
+
+# —————————————————————————————————————
+#  Search payload compaction
+# —————————————————————————————————————
+# Runs on search_web / search_web_multi output, i.e. before the results reach
+# Research_Agent and, through it, the to_summary handoff and both handoff
+# guardrails. Mirrored snippets (Wikipedia copies and the like) are detected
+# with a SimHash over word shingles, confirmed by shingle Jaccard, and folded
+# into the first copy; their URLs are kept under "also_at" so no distinct
+# source is lost. Each snippet is then capped, and once the total budget is
+# spent later results keep only title and URL. Full page text (PAGE_FETCH=1)
+# gets its own, larger caps, and is cut down to the paragraphs that mention
+# the query's words rather than to its first few hundred tokens.
+
+SHINGLE_WORDS = 4
+SIMHASH_BITS = 64
+MAX_HAMMING = 12  # candidate filter only; Jaccard confirms
+MIN_JACCARD = 0.7
+
+
+def word_shingles(text: str) -> Set[str]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def simhash(shingles: Set[str]) -> int:
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit, w in enumerate(weights) if w > 0)
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[: max_tokens * CHARS_PER_TOKEN].rsplit(" ", 1)[0]
+    return cut.rstrip(",.;: ") + "…"
+
+
+def select_passages(text: str, query: str, max_tokens: int) -> str:
+    """
+    The paragraphs of `text` sharing the most words with `query`, topped up
+    with the leading ones, in their original order and within max_tokens.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    words = {w for w in re.findall(r"\w+", query.lower()) if len(w) > 2}
+    passages = [p.strip() for p in text.split("\n") if p.strip()]
+    scores = [len(words & set(re.findall(r"\w+", p.lower()))) for p in passages]
+    chosen, used = [], 0
+    for i in sorted(range(len(passages)), key=lambda i: (-scores[i], i)):
+        cost = estimate_tokens(passages[i])
+        if used + cost > max_tokens:
+            continue
+        chosen.append(i)
+        used += cost
+    if not chosen:
+        return truncate_tokens(text, max_tokens)
+    return "\n".join(passages[i] for i in sorted(chosen))
+
+
+def compact_results(results: List[Dict], query: str = "") -> List[Dict]:
+    """
+    Drop near-duplicate results (keeping their URLs on the surviving copy) and
+    cap snippet sizes. Results must be in rank order; the first copy wins.
+    Results marked "fetched" carry page text and use the page caps.
+    """
+    per_result = int(os.getenv("RESULT_MAX_TOKENS", "250"))
+    total_budget = int(os.getenv("PAYLOAD_MAX_TOKENS", "1500"))
+    per_page = int(os.getenv("PAGE_RESULT_MAX_TOKENS", "1000"))
+    if any(r.get("fetched") for r in results):
+        total_budget = int(os.getenv("PAGE_PAYLOAD_MAX_TOKENS", "4000"))
+
+    kept: List[Dict] = []
+    fingerprints: List[tuple] = []
+    for result in results:
+        shingles = word_shingles(result.get("summary") or "")
+        fingerprint = simhash(shingles)
+        duplicate_of = next(
+            (
+                i for i, (fp, sh) in enumerate(fingerprints)
+                if bin(fp ^ fingerprint).count("1") <= MAX_HAMMING and jaccard(sh, shingles) >= MIN_JACCARD
+            ),
+            None,
+        ) if shingles else None
+        if duplicate_of is not None:
+            kept[duplicate_of].setdefault("also_at", []).append(result.get("url"))
+            continue
+        kept.append(dict(result))
+        fingerprints.append((fingerprint, shingles))
+
+    used = 0
+    for result in kept:
+        if result.pop("fetched", False):
+            summary = select_passages(result.get("summary") or "", query, per_page)
+        else:
+            summary = truncate_tokens(result.get("summary") or "", per_result)
+        cost = estimate_tokens(summary)
+        if used + cost > total_budget:
+            summary = ""  # over budget: keep the source, drop the snippet
+        used += estimate_tokens(summary)
+        result["summary"] = summary
+    return kept
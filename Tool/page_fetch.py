@@ -0,0 +1,289 @@
+import os
+import re
+import mmap
+import time
+import codecs
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from collections import Counter
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import httpx
+
+# —————————————————————————————————————
+#  Opt-in full-page fetch stage
+# —————————————————————————————————————
+# With PAGE_FETCH=1, search_web / search_web_multi download each result's page
+# and use its text in place of the Tavily snippet. Pages are streamed, never
+# loaded whole: bytes are capped at PAGE_FETCH_MAX_BYTES and fed through an
+# incremental HTML-to-text parser that stops at PAGE_TEXT_MAX_CHARS.
+# Extracted text is kept in a content-addressed store (blobs named by their
+# SHA-256) with a SQLite index from URL to blob, so a URL is fetched and
+# parsed once. Final failures (404, non-text pages) are recorded for good;
+# transient ones (transport errors, 429, 5xx) only for PAGE_RETRY_AFTER
+# seconds, after which the URL is tried again. Blobs are memory-mapped on
+# read and only the requested prefix is decoded.
+
+SKIP_TAGS = {"script", "style", "noscript", "svg", "template", "head", "nav", "footer", "iframe"}
+BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "tr", "section", "article", "header",
+              "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "table"}
+TEXT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+
+def is_transient(status: int) -> bool:
+    return status == 0 or status == 429 or status >= 500
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url         TEXT PRIMARY KEY,
+    sha256      TEXT,
+    status      INTEGER NOT NULL,
+    chars       INTEGER NOT NULL,
+    fetched_at  REAL NOT NULL
+);
+"""
+
+
+class TextExtractor(HTMLParser):
+    """
+    Incremental HTML-to-text: feed() chunks as they arrive, then read .text.
+    Sets .full once max_chars of text have been collected.
+    """
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts: List[str] = []
+        self.size = 0
+        self.full = False
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skipping += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skipping:
+            self._skipping -= 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._skipping or self.full:
+            return
+        data = re.sub(r"\s+", " ", data)
+        if data.strip():
+            self.parts.append(data)
+            self.size += len(data)
+            self.full = self.size >= self.max_chars
+
+    @property
+    def text(self) -> str:
+        text = "".join(self.parts)
+        text = re.sub(r" *\n[\n ]*", "\n", text)
+        return text.strip()[: self.max_chars]
+
+
+class DocumentStore:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.blobs = self.root / "blobs"
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.blobs.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.root / "index.sqlite3", check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def blob_path(self, sha: str) -> Path:
+        return self.blobs / sha[:2] / sha
+
+    def lookup(self, url: str) -> Optional[Tuple[Optional[str], int, float]]:
+        """
+        (sha256 or None, status, fetched_at) if the URL was already fetched.
+        """
+        with self._lock:
+            return self._connect().execute(
+                "SELECT sha256, status, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+
+    def put(self, url: str, text: Optional[str], status: int) -> Optional[str]:
+        sha = None
+        if text:
+            data = text.encode("utf-8")
+            sha = hashlib.sha256(data).hexdigest()
+            path = self.blob_path(sha)
+            if not path.exists():  # identical text from another URL is stored once
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(path.name + ".tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, path)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (url, sha256, status, chars, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, sha, status, len(text or ""), time.time()),
+            )
+            conn.commit()
+        return sha
+
+    def read(self, sha: str, max_bytes: Optional[int] = None) -> str:
+        path = self.blob_path(sha)
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                data = view[:max_bytes] if max_bytes else view[:]
+        return data.decode("utf-8", errors="ignore")  # a cut may split a character
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pages, failed = self._connect().execute(
+                "SELECT COUNT(*), SUM(sha256 IS NULL) FROM pages"
+            ).fetchone()
+        return {"pages": pages, "failed": failed or 0}
+
+
+_store: Optional[DocumentStore] = None
+_client: Optional[httpx.AsyncClient] = None
+_inflight: Dict[str, "asyncio.Task[Optional[str]]"] = {}
+_waiters: Counter = Counter()
+
+
+def fetch_enabled() -> bool:
+    return os.getenv("PAGE_FETCH", "0") == "1"
+
+
+def get_document_store() -> DocumentStore:
+    global _store
+    if _store is None:
+        _store = DocumentStore(Path(os.getenv("PAGE_STORE_PATH", ".cache/pages")))
+    return _store
+
+
+def get_fetch_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=int(os.getenv("PAGE_FETCH_MAX_CONNECTIONS", "16"))),
+            timeout=httpx.Timeout(float(os.getenv("PAGE_FETCH_TIMEOUT", "10")), connect=5.0),
+            headers={"User-Agent": "Smart-Research-Assistant/0.1 (+page fetch)"},
+        )
+    return _client
+
+
+async def close_fetch_client() -> None:
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+async def download_text(url: str) -> Tuple[Optional[str], int]:
+    """
+    Stream `url` and extract its text under the byte and character caps.
+    Returns (text or None, HTTP status; 0 on a transport error).
+    """
+    max_bytes = int(os.getenv("PAGE_FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+    extractor = TextExtractor(int(os.getenv("PAGE_TEXT_MAX_CHARS", "20000")))
+    try:
+        async with get_fetch_client().stream("GET", url) as resp:
+            content_type = resp.headers.get("content-type", "").lower()
+            if resp.status_code != 200 or not content_type.startswith(TEXT_TYPES):
+                return None, resp.status_code
+            charset = resp.charset_encoding or "utf-8"
+            try:
+                decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+            except LookupError:
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            plain = content_type.startswith("text/plain")
+            received = 0
+            async for chunk in resp.aiter_bytes():
+                chunk = chunk[: max_bytes - received]
+                received += len(chunk)
+                text = decoder.decode(chunk)
+                if plain:
+                    extractor.handle_data(text)
+                else:
+                    extractor.feed(text)
+                if received >= max_bytes or extractor.full:
+                    break  # leaving the block closes the stream early
+            if not plain:
+                extractor.close()
+            return extractor.text or None, resp.status_code
+    except httpx.HTTPError:
+        return None, 0
+
+
+async def fetch_page(url: str) -> Optional[str]:
+    """
+    Text of `url` from the store, fetching it once if it was never seen.
+    Concurrent requests for the same URL share one download, which is
+    cancelled when the last of them is.
+    """
+    store = get_document_store()
+    known = await asyncio.to_thread(store.lookup, url)
+    if known is not None:
+        sha, status, fetched_at = known
+        if sha:
+            return await asyncio.to_thread(store.read, sha)
+        retry_after = float(os.getenv("PAGE_RETRY_AFTER", "600"))
+        if not is_transient(status) or time.time() - fetched_at < retry_after:
+            return None
+
+    task = _inflight.get(url)
+    if task is None:
+        async def fetch_and_store() -> Optional[str]:
+            text, status = await download_text(url)
+            await asyncio.to_thread(store.put, url, text, status)
+            return text
+
+        task = asyncio.ensure_future(fetch_and_store())
+        _inflight[url] = task
+        task.add_done_callback(lambda _: _inflight.pop(url, None))
+    _waiters[url] += 1
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        if _waiters[url] == 1:
+            task.cancel()
+        raise
+    finally:
+        _waiters[url] -= 1
+        if not _waiters[url]:
+            del _waiters[url]
+
+
+async def enrich_results(results: List[Dict]) -> List[Dict]:
+    """
+    Replace each result's snippet with its page text when fetching is enabled,
+    the result has an http(s) URL and the page yielded more text than the
+    snippet. Runs the fetches
+    concurrently, at most PAGE_FETCH_CONCURRENCY at a time.
+    """
+    if not fetch_enabled() or not results:
+        return results
+    slots = asyncio.Semaphore(int(os.getenv("PAGE_FETCH_CONCURRENCY", "4")))
+
+    async def one(result: Dict) -> Dict:
+        # Local index hits carry synthetic "local:" URLs; only web pages are fetched
+        if not (result.get("url") or "").startswith(("http://", "https://")):
+            return result
+        async with slots:
+            text = await fetch_page(result["url"])
+        if text and len(text) > len(result.get("summary") or ""):
+            return {**result, "summary": text, "fetched": True}
+        return result
+
+    return list(await asyncio.gather(*(one(r) for r in results)))
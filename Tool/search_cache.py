@@ -0,0 +1,140 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+import unicodedata
+from pathlib import Path
+from typing import List, Dict, Optional
+
+# —————————————————————————————————————
+#  On-disk TTL/LRU cache for Tavily results
+# —————————————————————————————————————
+# Entries live in a small SQLite file keyed by the normalized query plus
+# max_results. Every entry expires after `ttl` seconds; when the table grows
+# past `max_entries` the least recently read rows are evicted.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    key         TEXT PRIMARY KEY,
+    payload     TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_cache_accessed ON search_cache(accessed_at);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """
+    Case-fold, collapse whitespace and strip edge punctuation so trivially
+    different spellings of the same query share one cache entry.
+    """
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(" \t\n?!.,;:'\"")
+
+
+class SearchCache:
+    def __init__(self, path: Path, ttl: float, max_entries: int):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    @staticmethod
+    def make_key(query: str, max_results: int) -> str:
+        return f"{normalize_query(query)}|{max_results}"
+
+    def get(self, query: str, max_results: int) -> Optional[List[Dict]]:
+        key = self.make_key(query, max_results)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT payload, created_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                    conn.commit()
+                self.misses += 1
+                return None
+            conn.execute("UPDATE search_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, query: str, max_results: int, results: List[Dict]) -> None:
+        key = self.make_key(query, max_results)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, payload, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(results), now, now),
+            )
+            conn.execute("DELETE FROM search_cache WHERE created_at < ?", (now - self.ttl,))
+            (size,) = conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()
+            overflow = size - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM search_cache WHERE key IN ("
+                    "SELECT key FROM search_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+            conn.commit()
+
+    async def aget(self, query: str, max_results: int) -> Optional[List[Dict]]:
+        return await asyncio.to_thread(self.get, query, max_results)
+
+    async def aput(self, query: str, max_results: int, results: List[Dict]) -> None:
+        await asyncio.to_thread(self.put, query, max_results, results)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            (size,) = self._connect().execute("SELECT COUNT(*) FROM search_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": size,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """
+    Return the process-wide cache, or None when SEARCH_CACHE_TTL is 0.
+    """
+    global _cache
+    ttl = float(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+    if ttl <= 0:
+        return None
+    if _cache is None:
+        _cache = SearchCache(
+            path=Path(os.getenv("SEARCH_CACHE_PATH", ".cache/search_cache.sqlite3")),
+            ttl=ttl,
+            max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000")),
+        )
+    return _cache
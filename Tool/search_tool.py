@@ -1,14 +1,123 @@
 import os
-from typing import List, Dict 
-from tavily import TavilyClient
+import asyncio
+from typing import List, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import httpx
 from agents import function_tool
+from Tool.search_cache import get_search_cache, normalize_query
+from Tool.compaction import compact_results
+from Tool.page_fetch import enrich_results
+from Cache.corpus_index import local_results, index_results
+from Models.ratelimit import call_with_retries
+
+# —————————————————————————————————————
+#  Shared Tavily HTTP client
+# —————————————————————————————————————
+# One long-lived AsyncClient for the whole process: keep-alive connections are
+# reused across searches, so concurrent sessions don't block the event loop or
+# pay a fresh TLS handshake on every call. Pool size is tunable through env.
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("TAVILY_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("TAVILY_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("TAVILY_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+def get_search_client() -> httpx.AsyncClient:
+    """
+    Return the shared Tavily client, creating it on first use.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=os.getenv("TAVILY_BASE_URL", "https://api.tavily.com"),
+            limits=_pool_limits(),
+            timeout=httpx.Timeout(float(os.getenv("TAVILY_TIMEOUT", "30")), connect=10.0),
+            headers={"Content-Type": "application/json"},
+        )
+    return _client
+
+
+async def close_search_client() -> None:
+    """
+    Close the shared client and release its pooled connections.
+    """
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+async def tavily_search(query: str, max_results: int = 3) -> List[Dict]:
+    """
+    Run one Tavily search over the shared client and return the raw result items.
+    Repeat queries are answered from the on-disk result cache without a round-trip.
+    """
+    cache = get_search_cache()
+    if cache is not None:
+        cached = await cache.aget(query, max_results)
+        if cached is not None:
+            return cached
+
+    api_key = os.getenv("TAVILY_API_KEY")
+    if not api_key:
+        raise ValueError("TAVILY_API_KEY not set in environment")
+
+    client = get_search_client()
+
+    async def post() -> httpx.Response:
+        resp = await client.post(
+            "/search",
+            json={"query": query, "max_results": max_results},
+            headers={"Authorization": f"Bearer {api_key}"},
+        )
+        resp.raise_for_status()
+        return resp
+
+    try:
+        # Shared Tavily rate limit; 429/5xx are retried with backoff
+        resp = await call_with_retries("tavily", post)
+    except httpx.HTTPError as e:
+        raise RuntimeError(f"Tavily API error: {e}")
+
+    items = resp.json().get("results", [])
+    if cache is not None and items:
+        await cache.aput(query, max_results, items)
+    return items
+
+
+async def find_results(query: str, max_results: int = 3) -> List[Dict]:
+    """
+    Raw result items for `query`: from the local BM25 index when it covers the
+    query (no network at all), otherwise from Tavily.
+    """
+    local = await local_results(query, max_results)
+    if local is not None:
+        return local
+    return await tavily_search(query, max_results=max_results)
+
+
+async def finish_results(results: List[Dict], query: str) -> List[Dict]:
+    """
+    Optional page fetch, indexing for later local answers, then compaction
+    (page text is cut to the passages relevant to `query`).
+    """
+    results = await enrich_results(results)
+    await index_results(results)
+    return compact_results(results, query)
+
+
 @function_tool(
     name_override="search_web",
     description_override="Use Tavily API to fetch top search results (title, url, snippet).",
     failure_error_function=lambda ctx, e: f"Error during Tavily search: {e}"
 )
-def search_web(
-    query: str, 
+async def search_web(
+    query: str,
     max_results: int = 3
 ) -> List[Dict]:
     """
@@ -23,25 +132,105 @@ def search_web(
         title   (str): Headline of the result.
         url     (str): Link to the source.
         summary (str): Short snippet or summary.
+        also_at (list, optional): URLs of near-identical copies folded into this one.
     """
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
-        raise ValueError("TAVILY_API_KEY not set in environment")
+    items = await find_results(query, max_results=max_results)
+
+    results = [format_result(item) for item in items]
+    if not results:
+        raise ValueError(f"No results for query: '{query}'")
+    return await finish_results(results, query)
+
+
+def format_result(item: Dict) -> Dict:
+    return {
+        "title": item.get("title"),
+        "url": item.get("url"),
+        "summary": item.get("content") or (item.get("raw_content") or "")[:200]
+    }
+
+
+# —————————————————————————————————————
+#  Multi-query fan-out
+# —————————————————————————————————————
+MAX_SUBQUERIES = 6
+RRF_K = 60  # reciprocal-rank-fusion damping constant
+
+
+def canonical_url(url: str) -> str:
+    """
+    Merge key for a URL: lower-cased host, no fragment, no tracking params,
+    no trailing slash.
+    """
+    parts = urlsplit(url or "")
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")])
+    host = parts.netloc.lower().removeprefix("www.")
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme, host, parts.path.rstrip("/"), query, ""))
 
-    client = TavilyClient(api_key=api_key)
-    try:
-        resp = client.search(query, max_results=max_results)
-    except Exception as e:
-        raise RuntimeError(f"Tavily API error: {e}")
 
-    results = [
-        {
-            "title": item.get("title"),
-            "url": item.get("url"),
-            "summary": item.get("content") or item.get("raw_content", "")[:200]
-        }
-        for item in resp.get("results", [])
+def merge_ranked(result_lists: List[List[Dict]], max_results: int) -> List[Dict]:
+    """
+    Merge per-query Tavily results by URL and rank them by reciprocal rank
+    fusion (sources found by several sub-queries rise), breaking ties by the
+    best Tavily relevance score.
+    """
+    merged: Dict[str, Dict] = {}
+    for items in result_lists:
+        for rank, item in enumerate(items, start=1):
+            key = canonical_url(item.get("url", ""))
+            entry = merged.setdefault(key, {"item": item, "rrf": 0.0, "score": 0.0, "hits": 0})
+            entry["rrf"] += 1.0 / (RRF_K + rank)
+            entry["hits"] += 1
+            if (item.get("score") or 0.0) > entry["score"]:
+                entry["score"] = item.get("score") or 0.0
+                entry["item"] = item
+    ranked = sorted(merged.values(), key=lambda e: (e["rrf"], e["score"]), reverse=True)
+    return [
+        {**format_result(e["item"]), "matched_queries": e["hits"]}
+        for e in ranked[:max_results]
     ]
+
+
+@function_tool(
+    name_override="search_web_multi",
+    description_override=(
+        "Search several sub-queries (facets of one topic) in parallel and return "
+        "the merged results, de-duplicated by URL and ranked by relevance."
+    ),
+    failure_error_function=lambda ctx, e: f"Error during Tavily search: {e}"
+)
+async def search_web_multi(
+    queries: List[str],
+    max_results: int = 6,
+    per_query: int = 3
+) -> List[Dict]:
+    """
+    Run up to six search sub-queries concurrently and merge their results.
+
+    Parameters:
+      - queries: Focused sub-queries or facets (e.g. ["pakistan economy", "pakistan history"]).
+      - max_results: How many merged results to return (default 6).
+      - per_query: Results to fetch per sub-query (default 3).
+
+    Returns:
+      A list of dicts (title, url, summary, matched_queries), best first.
+    """
+    unique: Dict[str, str] = {}
+    for q in queries:
+        if q.strip():
+            unique.setdefault(normalize_query(q), q)
+    subqueries = list(unique.values())[:MAX_SUBQUERIES]
+    if not subqueries:
+        raise ValueError("No sub-queries given")
+
+    outcomes = await asyncio.gather(
+        *(find_results(q, max_results=per_query) for q in subqueries),
+        return_exceptions=True,
+    )
+    result_lists = [o for o in outcomes if not isinstance(o, BaseException)]
+    if not result_lists:
+        raise outcomes[0]
+    results = merge_ranked(result_lists, max_results)
     if not results:
-        raise ValueError(f"No results for query: '{query}'")
-    return results
+        raise ValueError(f"No results for queries: {subqueries}")
+    return await finish_results(results, " ".join(subqueries))
@@ -0,0 +1,136 @@
+# batch.py
+import asyncio
+import argparse
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Set, Tuple
+from main import run_turn, new_context, shutdown
+from Context.session_store import MemorySessionStore
+
+# —————————————————————————————————————
+#  Batch research mode
+# —————————————————————————————————————
+# Runs the Triage→Research→Summary pipeline over a file of topics with a
+# bounded number of concurrent workers:
+#
+#   python batch.py topics.jsonl -o results.jsonl -w 8
+#
+# Input rows (JSONL or CSV) need a topic in "topic", "query" or "title" and
+# may carry an id in "id" or "request_id" (defaults to the row number).
+# Each result is appended to the output JSONL as soon as it finishes; rows
+# already there with status "ok" are skipped, so a crashed run can resume.
+
+TOPIC_KEYS = ("topic", "query", "title")
+ID_KEYS = ("id", "request_id")
+
+
+def read_topics(path: Path) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (id, topic) pairs from a JSONL or CSV file.
+    """
+    with open(path, newline="") as f:
+        if path.suffix.lower() == ".csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for number, row in enumerate(rows, start=1):
+            topic = next((str(row[k]).strip() for k in TOPIC_KEYS if row.get(k)), "")
+            if not topic:
+                raise ValueError(f"{path}:{number}: no topic in any of {', '.join(TOPIC_KEYS)}")
+            row_id = next((str(row[k]) for k in ID_KEYS if row.get(k)), str(number))
+            yield row_id, topic
+
+
+def finished_ids(path: Path) -> Set[str]:
+    """
+    Ids already written to the output with status "ok".
+    """
+    done: Set[str] = set()
+    if not path.exists():
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn line from a crash
+            if row.get("status") == "ok":
+                done.add(row["id"])
+    return done
+
+
+async def research_topic(row_id: str, topic: str, store: MemorySessionStore) -> Dict:
+    context = new_context(f"batch-{row_id}", "batch")
+    started = time.perf_counter()
+    answer, errors = None, []
+    async for event in run_turn(context, topic, store):
+        if event["type"] in ("message", "cached"):
+            answer = event["content"]
+        elif event["type"] == "error":
+            errors.append(event["message"])
+    return {
+        "id": row_id,
+        "topic": topic,
+        "status": "ok" if answer and not errors else "error",
+        "answer": answer,
+        "errors": errors,
+        "latency_s": round(time.perf_counter() - started, 3),
+    }
+
+
+async def run_batch(input_path: Path, output_path: Path, workers: int) -> None:
+    done = finished_ids(output_path)
+    pending = [(i, t) for i, t in read_topics(input_path) if i not in done]
+    print(f"{len(pending)} topic(s) to run, {len(done)} already done, {workers} worker(s)")
+
+    store = MemorySessionStore()
+    queue: "asyncio.Queue[Tuple[str, str]]" = asyncio.Queue()
+    for item in pending:
+        queue.put_nowait(item)
+    write_lock = asyncio.Lock()
+    counts = {"ok": 0, "error": 0}
+    started = time.perf_counter()
+
+    import aiofiles  # loaded with the first run, not at startup
+
+    async def worker() -> None:
+        while True:
+            try:
+                row_id, topic = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                result = await research_topic(row_id, topic, store)
+            except Exception as e:
+                result = {"id": row_id, "topic": topic, "status": "error", "answer": None, "errors": [str(e)]}
+            async with write_lock:
+                async with aiofiles.open(output_path, "a") as f:
+                    await f.write(json.dumps(result) + "\n")
+            counts[result["status"]] += 1
+            elapsed = time.perf_counter() - started
+            finished = counts["ok"] + counts["error"]
+            print(f"[{finished}/{len(pending)}] {row_id}: {result['status']} "
+                  f"({finished / elapsed * 60:.1f} topics/min)")
+
+    await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+    elapsed = time.perf_counter() - started
+    total = counts["ok"] + counts["error"]
+    print(f"Done: {counts['ok']} ok, {counts['error']} error in {elapsed:.1f}s"
+          + (f" — {total / elapsed:.2f} topics/s" if elapsed and total else ""))
+    await shutdown(store)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the research pipeline over a file of topics.")
+    parser.add_argument("input", type=Path, help="JSONL or CSV file of topics")
+    parser.add_argument("-o", "--output", type=Path, default=Path("batch_results.jsonl"),
+                        help="JSONL file results are appended to (default: batch_results.jsonl)")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="concurrent topics (default: 4)")
+    args = parser.parse_args()
+    asyncio.run(run_batch(args.input, args.output, args.workers))
+
+
+if __name__ == "__main__":
+    main()
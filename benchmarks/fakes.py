@@ -0,0 +1,360 @@
+import re
+import json
+import time
+import asyncio
+import argparse
+import itertools
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+# —————————————————————————————————————
+#  Local stand-ins for Gemini and Tavily
+# —————————————————————————————————————
+# Two small asyncio HTTP servers for offline benchmarks:
+#
+#   FakeModelServer   OpenAI-compatible POST /v1/chat/completions (JSON and
+#                     SSE streaming). It answers from a fixed script that walks
+#                     the real agent graph:
+#                       Triage_Agent    calls go_research
+#                       Research_Agent  calls search_web, then to_summary
+#                       judges          return a passing verdict built from
+#                                       the request's JSON schema
+#                       anything else   streams a short summary
+#   FakeTavilyServer  POST /search with deterministic results per query, and
+#                     GET /pages/... serving an HTML page for each result URL
+#                     (for the PAGE_FETCH=1 stage in Tool/page_fetch.py).
+#
+# Both add configurable latency. Point the app at them with GEMINI_BASE_URL
+# and TAVILY_BASE_URL. To run them standalone:
+#
+#   python -m benchmarks.fakes --model-port 9100 --tavily-port 9101
+
+# Verdict fields that must be False for a guardrail to pass; all others True.
+FLAG_FIELDS = re.compile(r"abusive|offensive|out_of_context|prohibited")
+
+SUMMARY_TEMPLATE = (
+    "Here are the key points on {topic}: first, {topic} has a long and documented "
+    "history; second, recent developments in {topic} are covered by several sources; "
+    "third, experts expect {topic} to keep changing over the next few years."
+)
+
+
+@dataclass
+class Latency:
+    first_token_s: float = 0.3   # model: time to first token / to a full JSON reply
+    per_token_s: float = 0.01    # model: delay between streamed chunks
+    judge_s: float = 0.2         # model: structured guardrail verdicts
+    search_s: float = 0.4        # tavily: per /search call
+    page_s: float = 0.2          # tavily: per result page
+
+
+# ———————————————————————— minimal HTTP/1.1 ————————————————————————
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bytes]]:
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        return None
+    method, path, _ = request_line.split(" ", 2)
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        key, _, value = line.partition(":")
+        headers[key.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path.split("?", 1)[0], body
+
+
+def send_json(writer: asyncio.StreamWriter, status: int, payload: Any) -> None:
+    body = json.dumps(payload).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+
+
+async def send_sse(writer: asyncio.StreamWriter, chunks: AsyncIterator[Dict]) -> None:
+    writer.write(
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: text/event-stream\r\n"
+        b"Transfer-Encoding: chunked\r\n\r\n"
+    )
+    async for chunk in chunks:
+        data = f"data: {json.dumps(chunk)}\n\n".encode()
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        await writer.drain()
+    data = b"data: [DONE]\n\n"
+    writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n0\r\n\r\n")
+
+
+class FakeServer:
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: Set[asyncio.Task] = set()
+        self.base_url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._serve, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return port
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in list(self._handlers):  # idle keep-alive connections
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Keep-alive: the app's pooled httpx clients reuse connections
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                await self.handle(writer, *request)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+
+    async def handle(self, writer: asyncio.StreamWriter, method: str, path: str, body: bytes) -> None:
+        raise NotImplementedError
+
+
+# ———————————————————————— fake Tavily ————————————————————————
+
+PAGE_TEMPLATE = """<!doctype html><html><head><title>{title}</title>
+<style>body {{ font-family: sans-serif; }}</style><script>var tracking = "{title}";</script></head>
+<body><nav>Home | About | Contact</nav><article><h1>{title}</h1>{paragraphs}</article>
+<footer>Copyright example.org</footer></body></html>"""
+
+
+class FakeTavilyServer(FakeServer):
+    async def handle(self, writer, method, path, body):
+        if method == "GET" and path.startswith("/pages/"):
+            await self.page(writer, path)
+            return
+        if (method, path) != ("POST", "/search"):
+            send_json(writer, 404, {"error": "not found"})
+            return
+        request = json.loads(body or b"{}")
+        query = request.get("query", "")
+        self.calls["search"] += 1
+        await asyncio.sleep(self.latency.search_s)
+        slug = re.sub(r"\W+", "-", query.lower()).strip("-") or "topic"
+        send_json(writer, 200, {"query": query, "results": [
+            {
+                "title": f"{query.title()} — source {i}",
+                "url": f"{self.base_url}/pages/{slug}/{i}",
+                "content": f"Source {i} on {query}: " + " ".join(
+                    f"fact{i}-{n} about {query}." for n in range(12)),
+                "score": round(1 - i / 10, 2),
+            }
+            for i in range(1, int(request.get("max_results", 3)) + 1)
+        ]})
+
+    async def page(self, writer: asyncio.StreamWriter, path: str) -> None:
+        self.calls["page"] += 1
+        await asyncio.sleep(self.latency.page_s)
+        topic = path.split("/")[2].replace("-", " ")
+        paragraphs = "".join(
+            f"<p>Paragraph {n} on {topic}: a longer account with details, dates and "
+            f"figures that the search snippet leaves out ({n}).</p>"
+            for n in range(40)
+        )
+        body = PAGE_TEMPLATE.format(title=topic.title(), paragraphs=paragraphs).encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/html; charset=utf-8\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+
+
+# ———————————————————————— fake model ————————————————————————
+
+def schema_value(schema: Dict, defs: Dict, name: str = "") -> Any:
+    """
+    A value satisfying `schema` that makes a guardrail verdict pass.
+    """
+    if "$ref" in schema:
+        return schema_value(defs[schema["$ref"].rsplit("/", 1)[-1]], defs, name)
+    for key in ("anyOf", "allOf"):
+        if key in schema:
+            return schema_value(schema[key][0], defs, name)
+    kind = schema.get("type")
+    if kind == "object":
+        return {k: schema_value(v, defs, k) for k, v in schema.get("properties", {}).items()}
+    if kind == "boolean":
+        return not FLAG_FIELDS.search(name)
+    if kind in ("integer", "number"):
+        return 0
+    if kind == "array":
+        return []
+    return "benchmark verdict"
+
+
+def last_user_text(messages: List[Dict]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            content = message.get("content")
+            if isinstance(content, list):
+                content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            return str(content or "")
+    return ""
+
+
+def called_tools(messages: List[Dict]) -> List[str]:
+    return [
+        call["function"]["name"]
+        for message in messages if message.get("role") == "assistant"
+        for call in message.get("tool_calls") or []
+    ]
+
+
+class FakeModelServer(FakeServer):
+    def __init__(self, latency: Latency):
+        super().__init__(latency)
+        self._ids = itertools.count(1)
+
+    def script(self, request: Dict) -> Tuple[str, Any]:
+        """
+        Decide the reply: ("judge", verdict), ("tool", (name, args)) or ("text", str).
+        """
+        messages = request.get("messages", [])
+        tools = {t["function"]["name"] for t in request.get("tools") or []}
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            return "judge", schema_value(schema, schema.get("$defs", {}))
+        topic = last_user_text(messages)
+        done = called_tools(messages)
+        if "go_research" in tools and "go_research" not in done:
+            return "tool", ("go_research", {})
+        if "search_web" in tools and "search_web" not in done:
+            return "tool", ("search_web", {"query": topic, "max_results": 3})
+        if "to_summary" in tools and "to_summary" not in done:
+            return "tool", ("to_summary", {})
+        return "text", SUMMARY_TEMPLATE.format(topic=topic[:80] or "the topic")
+
+    async def handle(self, writer, method, path, body):
+        if method != "POST" or not path.endswith("/chat/completions"):
+            send_json(writer, 404, {"error": {"message": "not found"}})
+            return
+        request = json.loads(body)
+        kind, reply = self.script(request)
+        self.calls[kind] += 1
+        model = request.get("model", "fake")
+        call_id = f"chatcmpl-{next(self._ids)}"
+        prompt_tokens = len(body) // 4
+        await asyncio.sleep(self.latency.judge_s if kind == "judge" else self.latency.first_token_s)
+
+        if kind == "judge":
+            message = {"role": "assistant", "content": json.dumps(reply)}
+        elif kind == "tool":
+            message = {"role": "assistant", "content": None, "tool_calls": [{
+                "id": f"call_{next(self._ids)}", "type": "function",
+                "function": {"name": reply[0], "arguments": json.dumps(reply[1])},
+            }]}
+        else:
+            message = {"role": "assistant", "content": reply}
+        text = message["content"] or ""
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": max(1, len(text) // 4),
+            "total_tokens": prompt_tokens + max(1, len(text) // 4),
+        }
+
+        if not request.get("stream"):
+            send_json(writer, 200, {
+                "id": call_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": message,
+                             "finish_reason": "tool_calls" if kind == "tool" else "stop"}],
+                "usage": usage,
+            })
+            return
+
+        async def chunks() -> AsyncIterator[Dict]:
+            base = {"id": call_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+            if kind == "tool":
+                call = message["tool_calls"][0]
+                yield {**base, "choices": [{"index": 0, "delta": {"role": "assistant", "tool_calls": [
+                    {"index": 0, **call}]}, "finish_reason": None}]}
+            else:
+                words = text.split(" ")
+                for i, word in enumerate(words):
+                    if i:
+                        await asyncio.sleep(self.latency.per_token_s)
+                    piece = word if i == 0 else " " + word
+                    yield {**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            yield {**base, "choices": [{"index": 0, "delta": {},
+                                        "finish_reason": "tool_calls" if kind == "tool" else "stop"}]}
+            yield {**base, "choices": [], "usage": usage}
+
+        await send_sse(writer, chunks())
+
+
+async def start_fakes(latency: Latency, model_port: int = 0, tavily_port: int = 0) -> Tuple[FakeModelServer, FakeTavilyServer, int, int]:
+    model_server, tavily_server = FakeModelServer(latency), FakeTavilyServer(latency)
+    return (
+        model_server, tavily_server,
+        await model_server.start(port=model_port),
+        await tavily_server.start(port=tavily_port),
+    )
+
+
+def add_latency_args(parser: argparse.ArgumentParser) -> None:
+    defaults = Latency()
+    parser.add_argument("--first-token", type=float, default=defaults.first_token_s,
+                        help=f"model seconds to first token (default {defaults.first_token_s})")
+    parser.add_argument("--per-token", type=float, default=defaults.per_token_s,
+                        help=f"model seconds between streamed chunks (default {defaults.per_token_s})")
+    parser.add_argument("--judge", type=float, default=defaults.judge_s,
+                        help=f"model seconds per guardrail verdict (default {defaults.judge_s})")
+    parser.add_argument("--search", type=float, default=defaults.search_s,
+                        help=f"tavily seconds per search (default {defaults.search_s})")
+    parser.add_argument("--page", type=float, default=defaults.page_s,
+                        help=f"seconds per fetched result page (default {defaults.page_s})")
+
+
+def latency_from_args(args: argparse.Namespace) -> Latency:
+    return Latency(args.first_token, args.per_token, args.judge, args.search, args.page)
+
+
+async def serve_forever(latency: Latency, model_port: int, tavily_port: int) -> None:
+    model_server, tavily_server, model_port, tavily_port = await start_fakes(latency, model_port, tavily_port)
+    print(f"GEMINI_BASE_URL=http://127.0.0.1:{model_port}/v1/")
+    print(f"TAVILY_BASE_URL=http://127.0.0.1:{tavily_port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await model_server.close()
+        await tavily_server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the fake Gemini and Tavily servers.")
+    parser.add_argument("--model-port", type=int, default=9100)
+    parser.add_argument("--tavily-port", type=int, default=9101)
+    add_latency_args(parser)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve_forever(latency_from_args(args), args.model_port, args.tavily_port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+from benchmarks.fakes import add_latency_args, latency_from_args, start_fakes
+
+# —————————————————————————————————————
+#  End-to-end pipeline benchmark
+# —————————————————————————————————————
+# Drives the real Triage_Agent → Research_Agent → Summary_Agent graph,
+# including its guardrails, through run_turn against the local fakes in
+# benchmarks/fakes.py. No API quota is used:
+#
+#   python -m benchmarks.pipeline --concurrency 1 4 16 --queries 32
+#
+# For each concurrency level it reports end-to-end latency (p50/p95/p99),
+# time to first visible output, LLM calls per query (agent turns vs guardrail
+# judges), guardrail time per query and throughput. Half the queries match
+# the local router's research templates and skip Triage_Agent; the other half
+# go through it. Answer, search and verdict caches and the local BM25 index are
+# off by default (--with-caches keeps them), so every query does the full
+# amount of work. Every on-disk cache and the page store live in a temporary
+# directory for the run, so fake documents never reach the real .cache/.
+# The fakes share the event loop with the pipeline; for very high concurrency
+# run them separately with `python -m benchmarks.fakes` and pass --external.
+# The run exits non-zero if any query ended in an error event, so it doubles
+# as an end-to-end smoke test of the pipeline.
+
+TOPICS = [
+    "solar panel recycling", "the history of the printing press", "coral reef bleaching",
+    "quantum error correction", "urban heat islands", "the economics of container shipping",
+    "lithium mining in South America", "the James Webb Space Telescope",
+]
+TEMPLATES = [
+    "tell me about {topic} ({n})",
+    "I am writing a report, could you dig up sources on {topic} ({n})?",
+]
+
+
+def configure_env(model_url: str, tavily_url: str, with_caches: bool, cache_dir: Path) -> None:
+    # Must run before main is imported; settings already in the
+    # environment win, except the endpoints, keys and cache paths.
+    os.environ.update({
+        "GEMINI_BASE_URL": model_url,
+        "GEMINI_API_KEY": "benchmark",
+        "TAVILY_BASE_URL": tavily_url,
+        "TAVILY_API_KEY": "benchmark",
+        "LOCAL_INDEX_PATH": str(cache_dir / "corpus_index.sqlite3"),
+        "ANSWER_CACHE_PATH": str(cache_dir / "answer_cache.sqlite3"),
+        "SEARCH_CACHE_PATH": str(cache_dir / "search_cache.sqlite3"),
+        "PAGE_STORE_PATH": str(cache_dir / "pages"),
+    })
+    if "GUARDRAIL_CACHE_PATH" in os.environ:
+        os.environ["GUARDRAIL_CACHE_PATH"] = str(cache_dir / "verdict_cache.sqlite3")
+    os.environ.setdefault("SESSION_STORE", "memory")
+    os.environ.setdefault("GEMINI_RPS", "1000")
+    os.environ.setdefault("GEMINI_BURST", "1000")
+    os.environ.setdefault("TAVILY_RPS", "1000")
+    os.environ.setdefault("TAVILY_BURST", "1000")
+    if not with_caches:
+        os.environ["ANSWER_CACHE_TTL"] = "0"
+        os.environ["SEARCH_CACHE_TTL"] = "0"
+        os.environ["LOCAL_INDEX"] = "0"
+        os.environ.pop("GUARDRAIL_CACHE_PATH", None)
+
+
+def make_queries(level: int, count: int) -> List[str]:
+    # Unique per level so the in-memory verdict cache never answers for a judge
+    return [
+        TEMPLATES[n % len(TEMPLATES)].format(topic=TOPICS[n % len(TOPICS)], n=f"{level}-{n}")
+        for n in range(count)
+    ]
+
+
+async def run_level(concurrency: int, queries: List[str], model_server, store) -> Dict:
+    from main import run_turn, new_context
+    from LifeCycle.metrics import metrics, Series
+
+    metrics.reset()
+    if model_server is not None:
+        model_server.calls.clear()
+    latency, first_output = Series(), Series()
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(n: int, query: str) -> None:
+        nonlocal errors
+        async with slots:
+            context = new_context(f"bench-{concurrency}-{n}", "bench")
+            started = time.perf_counter()
+            first = None
+            async for event in run_turn(context, query, store):
+                if first is None and event["type"] in ("delta", "message", "cached"):
+                    first = time.perf_counter() - started
+                if event["type"] == "error":
+                    errors += 1
+            latency.observe(time.perf_counter() - started)
+            if first is not None:
+                first_output.observe(first)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(n, q) for n, q in enumerate(queries)))
+    wall = time.perf_counter() - started
+
+    summary = metrics.summary()
+    guardrail_s = sum(s["sum_s"] for s in summary.get("guardrail", {}).values())
+    llm_calls = {role: s["count"] for role, s in summary.get("llm", {}).items()}
+    result = {
+        "concurrency": concurrency,
+        "queries": len(queries),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_qps": round(len(queries) / wall, 3),
+        **{f"latency_p{p}_s": round(latency.quantile(p / 100), 3) for p in (50, 95, 99)},
+        "first_output_p50_s": round(first_output.quantile(0.5), 3),
+        "llm_calls_per_query": round(sum(llm_calls.values()) / len(queries), 2),
+        "agent_calls_per_query": round(llm_calls.get("main", 0) / len(queries), 2),
+        "judge_calls_per_query": round(llm_calls.get("guardrail", 0) / len(queries), 2),
+        "guardrail_s_per_query": round(guardrail_s / len(queries), 3),
+    }
+    if model_server is not None:
+        result["fake_model_calls"] = dict(model_server.calls)
+    return result
+
+
+def print_table(results: List[Dict]) -> None:
+    columns = [
+        ("concurrency", "conc"), ("throughput_qps", "q/s"), ("latency_p50_s", "p50"),
+        ("latency_p95_s", "p95"), ("latency_p99_s", "p99"), ("first_output_p50_s", "first"),
+        ("llm_calls_per_query", "llm/q"), ("judge_calls_per_query", "judge/q"),
+        ("guardrail_s_per_query", "guard s/q"), ("errors", "err"),
+    ]
+    print("  ".join(f"{title:>9}" for _, title in columns))
+    for row in results:
+        print("  ".join(f"{row[key]:>9}" for key, _ in columns))
+
+
+async def run(args: argparse.Namespace) -> List[Dict]:
+    with tempfile.TemporaryDirectory(prefix="pipeline-bench-") as cache_dir:
+        return await run_isolated(args, Path(cache_dir))
+
+
+async def run_isolated(args: argparse.Namespace, cache_dir: Path) -> List[Dict]:
+    model_server = tavily_server = None
+    if args.external:
+        model_url, tavily_url = args.external
+    else:
+        model_server, tavily_server, model_port, tavily_port = await start_fakes(latency_from_args(args))
+        model_url, tavily_url = f"http://127.0.0.1:{model_port}/v1/", f"http://127.0.0.1:{tavily_port}"
+    configure_env(model_url, tavily_url, args.with_caches, cache_dir)
+    if args.fetch_pages:
+        os.environ["PAGE_FETCH"] = "1"
+
+    from main import shutdown
+    from Context.session_store import MemorySessionStore
+
+    store = MemorySessionStore()
+    results = []
+    try:
+        for level in args.concurrency:
+            result = await run_level(level, make_queries(level, args.queries), model_server, store)
+            results.append(result)
+            print(json.dumps(result))
+    finally:
+        await shutdown(store)
+        for server in (model_server, tavily_server):
+            if server is not None:
+                await server.close()
+    print()
+    print_table(results)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the agent pipeline against local fakes.")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="concurrency levels to run (default: 1 4 16)")
+    parser.add_argument("-n", "--queries", type=int, default=16, help="queries per level (default: 16)")
+    parser.add_argument("--with-caches", action="store_true", help="leave answer/search/verdict caches on")
+    parser.add_argument("--fetch-pages", action="store_true", help="enable the PAGE_FETCH=1 full-page stage")
+    parser.add_argument("--external", nargs=2, metavar=("MODEL_URL", "TAVILY_URL"),
+                        help="use fakes already running elsewhere instead of starting them")
+    parser.add_argument("-o", "--output", type=Path, help="also write results as JSON here")
+    add_latency_args(parser)
+    args = parser.parse_args()
+    results = asyncio.run(run(args))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    failed = sum(r["errors"] for r in results)
+    if failed:
+        sys.exit(f"{failed} quer{'y' if failed == 1 else 'ies'} ended in an error")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# —————————————————————————————————————
+#  Cold-start benchmark
+# —————————————————————————————————————
+# Measures how long the entry points take to import, using fresh interpreters
+# with `python -X importtime`:
+#
+#   python -m benchmarks.startup                      # main, 5 runs
+#   python -m benchmarks.startup -m main server batch -n 10 --with-agents
+#
+# For each module it reports the median/min import time, the median process
+# wall time (interpreter start included), the heaviest direct imports and
+# which heavy third-party packages were loaded eagerly (none should be: they
+# belong to main.get_agents()). --with-agents also times building the agent
+# graph, i.e. the cost moved to the first turn. --budget makes the run fail
+# when main's median import time exceeds it, for CI.
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ("agents", "openai", "agentops", "httpx", "aiofiles", "tavily")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, int, str]]:
+    """
+    (depth, self_us, cumulative_us, module) for each -X importtime line.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def run_once(module: str) -> Dict:
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    total = next(cum for depth, _, cum, name in rows if depth == 0 and name == module)
+    # Direct imports of the module are the rows one level below it
+    children = [(name, cum) for depth, _, cum, name in rows if depth == 1]
+    loaded = {name.split(".")[0] for *_, name in rows}
+    return {
+        "import_s": total / 1e6,
+        "wall_s": wall,
+        "children": children,
+        "eager": sorted(loaded & set(HEAVY)),
+    }
+
+
+def time_agents(runs: int) -> float:
+    code = "import time, main; t = time.perf_counter(); main.get_agents(); print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"building the agents failed:\n{proc.stderr[-2000:]}")
+        samples.append(float(proc.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def measure(module: str, runs: int, top: int) -> Dict:
+    run_once(module)  # compiles .pyc files so every measured run starts alike
+    samples = [run_once(module) for _ in range(runs)]
+    imports = [s["import_s"] for s in samples]
+    median_run = sorted(samples, key=lambda s: s["import_s"])[len(samples) // 2]
+    heaviest = sorted(median_run["children"], key=lambda c: c[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "runs": runs,
+        "import_median_s": round(statistics.median(imports), 4),
+        "import_min_s": round(min(imports), 4),
+        "wall_median_s": round(statistics.median(s["wall_s"] for s in samples), 4),
+        "heaviest": {name: round(us / 1e6, 4) for name, us in heaviest},
+        "eager_heavy": median_run["eager"],
+    }
+
+
+def print_table(results: List[Dict]) -> None:
+    columns = [("module", "module"), ("import_median_s", "import"), ("import_min_s", "min"),
+               ("wall_median_s", "process"), ("eager_heavy", "eager")]
+    print("  ".join(f"{title:>10}" for _, title in columns))
+    for row in results:
+        print("  ".join(f"{str(row[key]):>10}" for key, _ in columns))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure entry point import (cold-start) time.")
+    parser.add_argument("-m", "--modules", nargs="+", default=["main"],
+                        help="modules to import (default: main)")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="measured runs per module (default: 5)")
+    parser.add_argument("--top", type=int, default=8, help="heaviest direct imports to list (default: 8)")
+    parser.add_argument("--with-agents", action="store_true", help="also time main.get_agents()")
+    parser.add_argument("--budget", type=float, help="fail if main's median import time exceeds this (seconds)")
+    parser.add_argument("-o", "--output", type=Path, help="also write results as JSON here")
+    args = parser.parse_args()
+
+    results = []
+    for module in args.modules:
+        result = measure(module, args.runs, args.top)
+        if args.with_agents and module == "main":
+            result["build_agents_median_s"] = round(time_agents(args.runs), 4)
+        results.append(result)
+        print(json.dumps(result))
+    print()
+    print_table(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    main_result = next((r for r in results if r["module"] == "main"), None)
+    if args.budget is not None and main_result and main_result["import_median_s"] > args.budget:
+        sys.exit(f"main imports in {main_result['import_median_s']}s, over the {args.budget}s budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,33 @@
 # agents.py
-import os, asyncio
-from pathlib import Path
-import agentops
-import aiofiles
-import json
+import os, sys, asyncio, time
+from typing import TYPE_CHECKING, AsyncIterator, NamedTuple, Optional
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
-from agents.extensions import handoff_filters
-from Guardrails.Triage_guardrails import triage_agent_guardrail, triage_output_guardrail
-from Guardrails.research_guardrails import research_input_guardrail, research_output_guardrail
-from Guardrails.summary_guardrail import summary_input_guardrail, summary_output_guardrail
 from Context.dynamic import dynamic_context_wrapper, LocalContext
-from Tool.search_tool import search_web
-from LifeCycle.runnerlifecycle import MyRunHooks
-from LifeCycle.agentlifecycle import MyAgentHooks
-from agents import (
-    Agent,
-    Runner,
-    OpenAIChatCompletionsModel,
-    handoff,
-    set_tracing_disabled,
-    ItemHelpers,
-    InputGuardrailTripwireTriggered,
-    OutputGuardrailTripwireTriggered
-)
+from Context.session_store import get_session_store
+from Context.history import history_manager
+from Cache.answer_cache import get_answer_cache
+from Cache.corpus_index import index_summary, get_corpus_index
+from Routing.intent_router import route_intent
+from LifeCycle.streaming import StreamRecorder, stream_stats
+from LifeCycle.metrics import metrics, begin_run
+from LifeCycle.query_scope import QueryScope, QueryCancelled, activate, cancel_on_trip, query_timeout
+from Models.hedging import hedge_stats
+
+if TYPE_CHECKING:
+    from agents import Agent
+
+# —————————————————————————————————————
+#  Lazy startup
+# —————————————————————————————————————
+# Importing this module loads only the local pieces (session store, caches,
+# router, metrics), so the prompt appears at once. The Agents SDK, the model
+# client, the guardrail modules with their judge agents, the search tools and
+# AgentOps (only when AGENTOPS_API_KEY is set) are loaded by get_agents() on
+# the first turn that needs a model. Track it with `python -m benchmarks.startup`.
 
 load_dotenv()
-set_tracing_disabled(True)
-
-
-from agents import enable_verbose_stdout_logging
-
-# enable_verbose_stdout_logging()
-# Setup provider & model
-Provider = AsyncOpenAI(
-    api_key=os.getenv("GEMINI_API_KEY"),
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-)
-model = OpenAIChatCompletionsModel(
-    model="gemini-2.5-flash-lite-preview-06-17",
-    openai_client=Provider,
-)
-
-# agentops.init('Add Your AgentOps API Key here') 
-# Summary Agent
-summary_Agent = Agent(
-    name="Summary_Agent",
-    model=model,
-    instructions="""
+
+SUMMARY_INSTRUCTIONS = """
 You are the Summary Agent. You receive raw search results (list of {title, url, summary}).
 1. Step 1: Review each result briefly.
 2. Step 2: Extract the three most important insights.
@@ -56,86 +36,121 @@ You are the Summary Agent. You receive raw search results (list of {title, url,
 5. Step 5: Return the summary in Markdown format.
 
 Be concise, factual, and omit any irrelevant info.
-""", 
-    output_guardrails=[summary_output_guardrail],
-    input_guardrails=[summary_input_guardrail],
-)
-
-# Research Agent
-research_Agent = Agent(
-    name="Research_Agent",
-    model=model,
-    tools=[search_web],
-    input_guardrails=[research_input_guardrail],
-    output_guardrails=[research_output_guardrail],
-    handoffs=[
-        handoff(
-            agent=summary_Agent,
-            tool_name_override="to_summary",
-            tool_description_override="Pass raw search results to Summary_Agent.",
-            input_filter=handoff_filters.remove_all_tools,
-        )
-    ],
-    instructions="""
+"""
+
+RESEARCH_INSTRUCTIONS = """
 You are the Research Agent. Your goal is to gather raw data on the user’s topic.
 1. StepEn Step 1: Analyze the user’s request to form a precise search query.
-2. Step 2: CALL_TOOL search_web with that query.
+2. Step 2: CALL_TOOL search_web with that query. For a broad topic, instead CALL_TOOL
+   search_web_multi once with 2-5 focused sub-queries (facets); they run in parallel.
 3. Step 3: Collect the results (title, url, summary) in JSON form.
 4. Step 4: Think about whether the results cover the topic.
 5. Finally, emit HANDOFF: to_summary, attaching the raw results.
 
 Make your reasoning clear and only then hand off to Summary_Agent.
 """
-)
-
-hooks=MyAgentHooks()
-hooks.on_start
-hooks.on_end
-hooks.on_action
-hooks.on_agent_exception
-hooks.on_tool_start
-hooks.on_tool_end
-hooks.on_thought
-hooks.on_message
-hooks.on_handoff
-
-
-
-
-# Triage Agent
-Triage_Agent = Agent[LocalContext](
-    name="Triage_Agent",
-    model=model,
-    instructions=dynamic_context_wrapper,
-    handoffs=[
-        handoff(
-            agent=research_Agent,
-            tool_name_override="go_research",
-            tool_description_override="Fetch fresh research with Research_Agent.",
-        ),
-    ],
-    input_guardrails=[triage_agent_guardrail],
-    output_guardrails=[triage_output_guardrail],
-    hooks=hooks,
-)
 
-# Main async loop
-async def save_context(context, file_path):
-    async with aiofiles.open(file_path, "w") as f:
-        await f.write(json.dumps(context.model_dump(), indent=2))
 
-async def project():
-    while True:
-        user_id = input("Enter your user ID: ")
-        user_name = input("Enter your name: ")
-        context_file = Path(f"context_{user_id}.json")
+class AgentGraph(NamedTuple):
+    triage: "Agent"
+    research: "Agent"
+    summary: "Agent"
 
-        if context_file.exists():
-            print("❗ A conversation file with this ID or name already exists. Please use a different one.")
-        else:
-            break
 
-    context = LocalContext(
+_graph: Optional[AgentGraph] = None
+
+
+def build_agents() -> AgentGraph:
+    from agents import Agent, handoff, set_tracing_disabled
+    from agents.extensions import handoff_filters
+    from Guardrails.Triage_guardrails import triage_agent_guardrail, triage_output_guardrail
+    from Guardrails.research_guardrails import research_input_guardrail, research_output_guardrail
+    from Guardrails.summary_guardrail import summary_input_guardrail, summary_output_guardrail
+    from Tool.search_tool import search_web, search_web_multi
+    from LifeCycle.agentlifecycle import MyAgentHooks
+    from Models.registry import get_model
+
+    set_tracing_disabled(True)
+    # from agents import enable_verbose_stdout_logging
+    # enable_verbose_stdout_logging()
+    if os.getenv("AGENTOPS_API_KEY"):
+        import agentops
+
+        agentops.init()
+    # Setup model (client is created lazily and shared with the guardrail judges)
+    model = get_model("main")
+
+    # Summary Agent
+    summary_Agent = Agent(
+        name="Summary_Agent",
+        model=model,
+        instructions=SUMMARY_INSTRUCTIONS,
+        output_guardrails=[summary_output_guardrail],
+        input_guardrails=[summary_input_guardrail],
+    )
+
+    # Research Agent
+    research_Agent = Agent(
+        name="Research_Agent",
+        model=model,
+        tools=[search_web, search_web_multi],
+        input_guardrails=[research_input_guardrail],
+        output_guardrails=[research_output_guardrail],
+        handoffs=[
+            handoff(
+                agent=summary_Agent,
+                tool_name_override="to_summary",
+                tool_description_override="Pass raw search results to Summary_Agent.",
+                input_filter=handoff_filters.remove_all_tools,
+            )
+        ],
+        instructions=RESEARCH_INSTRUCTIONS,
+    )
+
+    # Triage Agent
+    Triage_Agent = Agent[LocalContext](
+        name="Triage_Agent",
+        model=model,
+        instructions=dynamic_context_wrapper,
+        handoffs=[
+            handoff(
+                agent=research_Agent,
+                tool_name_override="go_research",
+                tool_description_override="Fetch fresh research with Research_Agent.",
+            ),
+        ],
+        input_guardrails=[triage_agent_guardrail],
+        output_guardrails=[triage_output_guardrail],
+        hooks=MyAgentHooks(),
+    )
+
+    # A tripped guardrail cancels the rest of the query at once (LifeCycle/query_scope.py)
+    for agent in (summary_Agent, research_Agent, Triage_Agent):
+        for guardrail in agent.input_guardrails:
+            cancel_on_trip(guardrail, "input_guardrail")
+        for guardrail in agent.output_guardrails:
+            cancel_on_trip(guardrail, "output_guardrail")
+    return AgentGraph(triage=Triage_Agent, research=research_Agent, summary=summary_Agent)
+
+
+def get_agents() -> AgentGraph:
+    """
+    The Triage → Research → Summary graph, built on first use.
+    """
+    global _graph
+    if _graph is None:
+        _graph = build_agents()
+    return _graph
+
+CANCEL_MESSAGES = {
+    "input_guardrail": "Input flagged by guardrail. Please rephrase your request.",
+    "output_guardrail": "Output flagged by guardrail. Please try again later.",
+    "timeout": "The query took too long and was cancelled. Please try again.",
+    "disconnect": "The query was cancelled because the client disconnected.",
+}
+
+def new_context(user_id: str, user_name: str) -> LocalContext:
+    return LocalContext(
         user_id=user_id,
         name=user_name,
         query="",
@@ -145,70 +160,226 @@ async def project():
         preferred_language="en",
         history=[],
     )
-    print(f"Created new context for user {user_id}")
-    await save_context(context, context_file)
 
-    # runner_lifecycle = MyRunHooks()
-    # runner = Runner(hooks=runner_lifecycle)  # Instantiate Runner with hooks
+# One user turn through the pipeline
+async def run_turn(context: LocalContext, q: str, store, scope: Optional[QueryScope] = None) -> AsyncIterator[dict]:
+    """
+    Run one user turn and yield display events as plain dicts:
+      {"type": "agent", "agent": ...}            active agent changed
+      {"type": "tool_call"} / {"type": "tool_output", "output": ...}
+      {"type": "delta", "agent": ..., "text": ...}     streamed text as it arrives
+      {"type": "message", "agent": ..., "content": ..., "streamed": bool}
+                                                  ("Router" for local greeting replies)
+      {"type": "stream_stats", "agent": ..., "ttft_s": ..., "tokens": ..., "tokens_per_s": ...}
+      {"type": "cached", "query": ..., "similarity": ..., "content": ...}
+      {"type": "error", "message": ...}
+    Shared by the REPL below, server.py and batch.py. The run is bounded by
+    `scope` (a new QueryScope with QUERY_TIMEOUT by default); a timeout, a
+    tripped guardrail, scope.cancel() or the consumer stopping early cancels
+    all of its in-flight work.
+    """
+    started = time.perf_counter()
+    scope = scope or QueryScope(query_timeout())
+    if scope.reason is not None:  # e.g. the client left while the turn was queued
+        scope.close()
+        yield {"type": "error", "message": CANCEL_MESSAGES.get(scope.reason, scope.reason)}
+        return
+    context.query = q
+    context.has_data_to_summarize = False
+    context.source_type = "text"
+    context.search_needed = True
+    context.preferred_language = "en"
+    context.history.append({"role": "user", "content": q})
+    await store.save(context)
+    # Fold turns that left the token window while this turn runs
+    history_manager.schedule_compaction(context)
 
-    while True:
-        q = input("Enter topic or 'exit': ")
-        if q.lower() == "exit":
-            break
+    # Near-duplicate of a recently answered topic: reuse its summary and
+    # skip the whole Triage→Research→Summary chain.
+    answer_cache = get_answer_cache()
+    cached = await answer_cache.alookup(q) if answer_cache else None
+    if cached is not None:
+        cached_query, summary, score = cached
+        context.history.append({"role": "assistant", "content": summary})
+        await store.save(context)
+        scope.close()
+        yield {"type": "cached", "query": cached_query, "similarity": score, "content": summary}
+        await finish_turn("cached", started)
+        return
+
+    # Clear greetings and research requests skip the Triage_Agent model turn.
+    route = route_intent(q, context.name)
+    if route.kind == "greeting":
+        context.history.append({"role": "assistant", "content": route.reply})
+        await store.save(context)
+        scope.close()
+        yield {"type": "message", "agent": "Router", "content": route.reply, "streamed": False}
+        await finish_turn("greeting", started)
+        return
+    # Loaded here, not at startup: the SDK and the agents (see build_agents)
+    from agents import Runner, RunConfig, ItemHelpers, InputGuardrailTripwireTriggered, OutputGuardrailTripwireTriggered
+    from LifeCycle.runnerlifecycle import MyRunHooks
 
-        # print("=== Run starting ===")
+    graph = get_agents()
+    starting_agent = graph.research if route.kind == "research" else graph.triage
+    # The SDK only runs the starting agent's input guardrails: a routed turn
+    # still gets Triage_Agent's abuse check.
+    run_config = RunConfig(input_guardrails=list(graph.triage.input_guardrails)) if route.kind == "research" else None
 
-        try:
-            context.name = user_name
-            context.query = q
-            context.has_data_to_summarize = False
-            context.source_type = "text"
-            context.search_needed = True
-            context.preferred_language = "en"
-            context.history.append({"role": "user", "content": q})
-            await save_context(context, context_file)
+    begin_run(starting_agent.name)
+    run_hook = MyRunHooks()
+    # Tasks of the run are created here and inherit the scope
+    with activate(scope):
+        response = Runner.run_streamed(
+            starting_agent=starting_agent,
+            input=q,
+            context=context,
+            hooks=run_hook,  # Pass hooks to Runner
+            run_config=run_config,
+        )
+    scope.on_cancel(response.cancel)
 
-            run_hook = MyRunHooks()
-            run_hook.on_run_start
-            run_hook.on_run_end
+    recorder = StreamRecorder(starting_agent.name)
+    try:
+        summary = None
+        if route.kind == "research":
+            yield {"type": "agent", "agent": f"{graph.research.name} (routed locally)"}
+        async for event in scope.iterate(response.stream_events()):
+            if event.type == "raw_response_event":
+                delta = recorder.feed(event.data)
+                if delta:
+                    yield {"type": "delta", "agent": recorder.agent, "text": delta}
+            elif event.type == "agent_updated_stream_event":
+                recorder.begin(event.new_agent.name)
+                yield {"type": "agent", "agent": event.new_agent.name}
+            elif event.type == "run_item_stream_event":
+                if event.item.type == "tool_call_item":
+                    yield {"type": "tool_call"}
+                elif event.item.type == "tool_call_output_item":
+                    recorder.begin()  # the next model call starts now
+                    yield {"type": "tool_output", "output": event.item.output}
+                elif event.item.type == "message_output_item":
+                    # Keep the text the user watched stream by
+                    message = recorder.text or ItemHelpers.text_message_output(event.item)
+                    streamed = bool(recorder.text)
+                    sample = recorder.finish()
+                    context.history.append({"role": "assistant", "content": message})
+                    await store.save(context)
+                    if event.item.agent.name == graph.summary.name:
+                        summary = message
+                    yield {"type": "message", "agent": event.item.agent.name, "content": message, "streamed": streamed}
+                    if sample:
+                        yield {"type": "stream_stats", **sample}
 
+        # Only cache once the run finished without tripping a guardrail.
+        if summary and answer_cache:
+            await answer_cache.astore(q, summary)
+        if summary:
+            await index_summary(q, summary)
 
+    except QueryCancelled as e:
+        yield {"type": "error", "message": CANCEL_MESSAGES.get(e.reason, str(e))}
+    except InputGuardrailTripwireTriggered:
+        yield {"type": "error", "message": CANCEL_MESSAGES["input_guardrail"]}
+    except OutputGuardrailTripwireTriggered:
+        yield {"type": "error", "message": CANCEL_MESSAGES["output_guardrail"]}
+    except KeyError as ke:
+        yield {"type": "error", "message": f"Missing field in event: {ke}"}
+    except Exception as e:
+        yield {"type": "error", "message": f"Error during run: {e}"}
+    finally:
+        # Stops whatever is still running (also after a trip or an early close)
+        response.cancel()
+        scope.close()
+    await finish_turn(route.kind, started)
 
-            response = Runner.run_streamed(
-                starting_agent=Triage_Agent,
-                input=q,
-                context=context,
-                hooks=run_hook,  # Pass hooks to Runner
-            )
+async def finish_turn(path: str, started: float) -> None:
+    metrics.observe("turn", path, time.perf_counter() - started)
+    await metrics.flush()
+
+def print_event(event: dict) -> None:
+    if event["type"] == "agent":
+        print(f"Agent updated: {event['agent']}")
+    elif event["type"] == "tool_call":
+        print("-- Tool was called")
+    elif event["type"] == "tool_output":
+        print(f"-- Tool output: {event['output']}")
+    elif event["type"] == "delta":
+        print(event["text"], end="", flush=True)
+    elif event["type"] == "message":
+        if event.get("streamed"):
+            print()  # the text was already printed delta by delta
+        else:
+            print(f"-- Message output:\n {event['content']}")
+    elif event["type"] == "stream_stats":
+        rate = f", {event['tokens_per_s']} tok/s" if event["tokens_per_s"] else ""
+        print(f"-- {event['agent']}: first token {event['ttft_s']:.2f}s, {event['tokens']} tokens{rate}")
+    elif event["type"] == "cached":
+        print(f"-- Cached answer for '{event['query']}' (similarity {event['similarity']:.2f}):\n {event['content']}")
+    elif event["type"] == "error":
+        print(f"{event['message']}\n")
+
+async def shutdown(store) -> None:
+    await history_manager.drain()
+    metrics.report()
+    await metrics.flush()
+    for agent, stats in stream_stats.summary().items():
+        rate = f", {stats['tokens_per_s_avg']} tok/s avg" if stats["tokens_per_s_avg"] else ""
+        print(f"### {agent}: {stats['calls']} streamed call(s), first token {stats['ttft_avg_s']:.2f}s avg "
+              f"/ {stats['ttft_max_s']:.2f}s max{rate}")
+    # Only what a turn actually loaded has stats to print or clients to close
+    verdicts = sys.modules.get("Guardrails.verdict_cache")
+    if verdicts is not None:
+        for name, stats in verdicts.get_verdict_cache().stats().items():
+            print(f"### {name}: {stats['hits']} cached / {stats['misses']} judged ({stats['hit_rate']:.0%} hit rate)")
+    searches = sys.modules.get("Tool.search_cache")
+    search_cache = searches.get_search_cache() if searches is not None else None
+    if search_cache is not None and search_cache.hits + search_cache.misses:
+        stats = search_cache.stats()
+        print(f"### search cache: {stats['hits']} cached / {stats['misses']} sent to Tavily "
+              f"({stats['hit_rate']:.0%} hit rate, {stats['evictions']} evicted, {stats['size']} stored)")
+    corpus = get_corpus_index()
+    if corpus is not None and corpus.local_hits + corpus.fallbacks:
+        print(f"### local index: {corpus.local_hits} search(es) answered locally, {corpus.fallbacks} sent to Tavily")
+    for label, count in sorted(hedge_stats.items()):
+        print(f"### hedge {label}: {count}")
+    for module, close in (
+        ("Tool.search_tool", "close_search_client"),
+        ("Tool.page_fetch", "close_fetch_client"),
+        ("Models.registry", "close_client"),
+    ):
+        if module in sys.modules:
+            await getattr(sys.modules[module], close)()
+    await store.close()
+
+# Main async loop
+async def project():
+    store = get_session_store()
+    while True:
+        user_id = input("Enter your user ID: ")
+        user_name = input("Enter your name: ")
+
+        if await store.exists(user_id):
+            print("❗ A conversation file with this ID or name already exists. Please use a different one.")
+        else:
+            break
+
+    context = new_context(user_id, user_name)
+    print(f"Created new context for user {user_id}")
+    await store.save(context)
+
+    while True:
+        q = input("Enter topic or 'exit': ")
+        if q.lower() == "exit":
+            break
+
+        print(f"### Context tokens: {history_manager.context_tokens(context)}")
+        async for event in run_turn(context, q, store):
+            print_event(event)
 
-            async for event in response.stream_events():
-                if event.type == "raw_response_event":
-                    continue
-                elif event.type == "agent_updated_stream_event":
-                    print(f"Agent updated: {event.new_agent.name}")
-                elif event.type == "run_item_stream_event":
-                    if event.item.type == "tool_call_item":
-                        print("-- Tool was called")
-                    elif event.item.type == "tool_call_output_item":
-                        print(f"-- Tool output: {event.item.output}")
-                    elif event.item.type == "message_output_item":
-                        message = ItemHelpers.text_message_output(event.item)
-                        print(f"-- Message output:\n {message}")
-                        context.history.append({"role": "assistant", "content": message})
-                        await save_context(context, context_file)
-                else:
-                    pass
-
-        except InputGuardrailTripwireTriggered:
-            print("Input flagged by guardrail. Please rephrase your request.\n")
-        except OutputGuardrailTripwireTriggered:
-            print("Output flagged by guardrail. Please try again later.\n")
-        except KeyError as ke:
-            print(f"Missing field in event: {ke}\n")
-        except Exception as e:
-            print(f"Error during run: {e}\n")
-
-        # print("=== Run complete ===\n")
+    await history_manager.drain()
+    await store.save(context)
+    await shutdown(store)
 
 if __name__ == "__main__":
     asyncio.run(project())
\ No newline at end of file
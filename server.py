@@ -0,0 +1,184 @@
+# server.py
+import os, asyncio
+import json
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote
+from dotenv import load_dotenv
+from main import run_turn, new_context, shutdown
+from LifeCycle.query_scope import QueryScope, query_timeout
+from Context.dynamic import LocalContext
+from Context.session_store import get_session_store
+from Context.history import history_manager
+
+# —————————————————————————————————————
+#  Multi-session server mode
+# —————————————————————————————————————
+# A small asyncio HTTP server that runs many LocalContext sessions at once
+# against the same Triage_Agent graph and streams each turn back as
+# Server-Sent Events.
+#
+#   POST /sessions/{user_id}/turns   {"query": "...", "name": "..."}  -> text/event-stream
+#   GET  /health                                                      -> JSON stats
+#
+# Turns of the same session are serialized by a per-session lock; a global
+# semaphore (SERVER_MAX_CONCURRENCY) bounds how many turns run at once. Each
+# turn has a QUERY_TIMEOUT deadline counted from the request, and a client
+# that disconnects cancels its turn, queued or running.
+
+load_dotenv()
+
+MAX_BODY_BYTES = 64 * 1024
+
+
+class SessionServer:
+    def __init__(self, max_concurrency: int):
+        self.store = get_session_store()
+        self.sessions: Dict[str, LocalContext] = {}
+        self.locks: Dict[str, asyncio.Lock] = {}
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.active_turns = 0
+        self.served_turns = 0
+
+    async def session(self, user_id: str, name: str) -> LocalContext:
+        context = self.sessions.get(user_id)
+        if context is None:
+            context = await self.store.load(user_id)
+            if context is None:
+                context = new_context(user_id, name or user_id)
+                await self.store.save(context)
+            self.sessions[user_id] = context
+        return context
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, body = await read_request(reader)
+            if method == "GET" and path == "/health":
+                await send_json(writer, 200, {
+                    "sessions": len(self.sessions),
+                    "active_turns": self.active_turns,
+                    "served_turns": self.served_turns,
+                    "max_concurrency": self.max_concurrency,
+                })
+                return
+            parts = path.strip("/").split("/")
+            if method == "POST" and len(parts) == 3 and parts[0] == "sessions" and parts[2] == "turns":
+                await self.stream_turn(reader, writer, unquote(parts[1]), body)
+                return
+            await send_json(writer, 404, {"error": f"No route for {method} {path}"})
+        except ValueError as e:
+            await send_json(writer, 400, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # client went away
+        finally:
+            writer.close()
+
+    async def stream_turn(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, user_id: str, body: bytes
+    ) -> None:
+        payload = json.loads(body or b"{}")
+        query = str(payload.get("query", "")).strip()
+        if not user_id or not query:
+            raise ValueError("user_id and a non-empty 'query' are required")
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        await writer.drain()
+
+        # The client sends nothing after the body, so EOF means it went away.
+        scope = QueryScope(query_timeout())
+        disconnect = asyncio.ensure_future(reader.read(1))
+
+        def on_eof(f: asyncio.Future) -> None:
+            if not f.cancelled() and (f.exception() is not None or not f.result()):
+                scope.cancel("disconnect")
+
+        disconnect.add_done_callback(on_eof)
+        lock = self.locks.setdefault(user_id, asyncio.Lock())
+        try:
+            # Session lock first, so queued turns of one user don't hold global slots.
+            async with lock, self.slots:
+                context = await self.session(user_id, str(payload.get("name", "")))
+                self.active_turns += 1
+                turn = run_turn(context, query, self.store, scope)
+                try:
+                    async for event in turn:
+                        await send_event(writer, event)
+                    await send_event(writer, {"type": "done"})
+                finally:
+                    # Closing the generator cancels the run if sending failed.
+                    await turn.aclose()
+                    self.active_turns -= 1
+                    self.served_turns += 1
+        finally:
+            disconnect.cancel()
+            scope.close()
+
+    async def close(self) -> None:
+        await history_manager.drain()
+        for context in self.sessions.values():
+            await self.store.save(context)
+        await shutdown(self.store)
+
+
+async def read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        raise ConnectionError("empty request")
+    try:
+        method, path, _ = request_line.split(" ", 2)
+    except ValueError:
+        raise ValueError(f"Malformed request line: '{request_line}'")
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        key, _, value = line.partition(":")
+        headers[key.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    if length > MAX_BODY_BYTES:
+        raise ValueError("Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path.split("?", 1)[0], body
+
+
+async def send_json(writer: asyncio.StreamWriter, status: int, payload: dict) -> None:
+    body = json.dumps(payload).encode()
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found"}.get(status, "")
+    writer.write(
+        f"HTTP/1.1 {status} {reason}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+
+async def send_event(writer: asyncio.StreamWriter, event: dict) -> None:
+    writer.write(f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n".encode())
+    await writer.drain()
+
+
+async def serve(host: Optional[str] = None, port: Optional[int] = None) -> None:
+    host = host or os.getenv("SERVER_HOST", "127.0.0.1")
+    port = port or int(os.getenv("SERVER_PORT", "8080"))
+    app = SessionServer(int(os.getenv("SERVER_MAX_CONCURRENCY", "64")))
+    server = await asyncio.start_server(app.handle, host, port, limit=MAX_BODY_BYTES)
+    print(f"Serving research pipeline on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await app.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass